@@ -2,69 +2,158 @@
 
 from __future__ import annotations
 
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import nullcontext
 from importlib.metadata import version
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 import typer
 
-from sourcecrumb.discovery import discover_files
+from sourcecrumb.discovery import DiscoveredFile, discover_files
 from sourcecrumb.graph import build_graph, rank_files
 from sourcecrumb.languages import LANGUAGES
 from sourcecrumb.models import FileInfo, RepoMap
+from sourcecrumb.parallel import iter_parse_files_parallel
 from sourcecrumb.parsing import extract_tags
 from sourcecrumb.ranking import select_files
-from sourcecrumb.toon import encode
+from sourcecrumb.tagcache import TagCache, file_digest
+from sourcecrumb.toon import dump
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
 _DEFAULT_MAX_FILE_SIZE = 1_000_000  # 1 MB
 
 
-def _cache_is_fresh(cache: Path, root: Path, files: list[tuple[Path, str]]) -> bool:
+def _cache_is_fresh(cache: Path, files: list[DiscoveredFile]) -> bool:
     """Check if cache file exists and is newer than all discovered source files."""
     if not cache.is_file():
         return False
-    cache_mtime = cache.stat().st_mtime
+    cache_mtime_ns = cache.stat().st_mtime_ns
+    return all(f.mtime_ns < cache_mtime_ns for f in files)
+
+
+def _write_cache(cache: Path, repo_map: RepoMap) -> None:
+    """Write the encoded map to cache atomically.
+
+    The map is streamed to a temporary file beside cache and renamed over
+    it only once complete, so an interrupted run never leaves a truncated
+    file that _cache_is_fresh would accept. A symlinked cache is resolved
+    first so the link is written through rather than replaced, and the new
+    file takes the old one's mode, or the umask default if there was none.
+    """
+    cache = cache.resolve()
     try:
-        return all((root / rel).stat().st_mtime < cache_mtime for rel, _ in files)
-    except OSError:
-        return False
+        mode = cache.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    fd, tmp_name = tempfile.mkstemp(
+        dir=cache.parent, prefix=f".{cache.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            dump(repo_map, f)
+            f.write("\n")
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, cache)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
 
 
 def _filter_by_size(
-    root: Path, files: list[tuple[Path, str]], max_size_bytes: int
-) -> list[tuple[Path, str]]:
+    files: list[DiscoveredFile], max_size_bytes: int
+) -> list[DiscoveredFile]:
     """Filter out files exceeding the size limit.
 
     Args:
-        root: Repository root directory.
-        files: List of (rel_path, lang_name) tuples.
+        files: Discovered files with their recorded sizes.
         max_size_bytes: Skip files larger than this.
 
     Returns:
         Filtered list with oversized files removed.
     """
-    kept: list[tuple[Path, str]] = []
-    for rel_path, lang_name in files:
-        try:
-            size = (root / rel_path).stat().st_size
-        except OSError:
-            kept.append((rel_path, lang_name))
-            continue
-        if size > max_size_bytes:
+    kept: list[DiscoveredFile] = []
+    for f in files:
+        if f.size > max_size_bytes:
             typer.echo(
-                f"Warning: {rel_path}: skipped (>{max_size_bytes} bytes)", err=True
+                f"Warning: {f.path}: skipped (>{max_size_bytes} bytes)", err=True
             )
             continue
-        kept.append((rel_path, lang_name))
+        kept.append(f)
     return kept
 
 
-def _parse_files_sequential(
-    root: Path, files: list[tuple[Path, str]]
+def _parse_files(
+    root: Path,
+    files: list[DiscoveredFile],
+    *,
+    fast: bool,
+    max_size_bytes: int,
+    tag_cache: TagCache | None,
 ) -> list[FileInfo]:
+    """Parse files, reusing cached tags for files unchanged since last run.
+
+    Args:
+        root: Repository root directory.
+        files: Discovered files to parse.
+        fast: Parse cache misses in parallel.
+        max_size_bytes: Skip files larger than this.
+        tag_cache: Optional per-file tag cache to read from and update.
+
+    Returns:
+        List of FileInfo in the same order as files, omitting failures.
+    """
+    by_path: dict[Path, FileInfo] = {}
+    pending = files
+    digests: dict[Path, bytes] = {}
+    if tag_cache is not None:
+        for f in files:
+            tags = tag_cache.get(f.path, f.mtime_ns, f.size)
+            if tags is None:
+                # New or touched since it was cached; contents may still match.
+                try:
+                    digests[f.path] = file_digest(root / f.path)
+                except OSError:
+                    continue
+                tags = tag_cache.get_by_digest(f.path, digests[f.path])
+                if tags is not None:
+                    tag_cache.put(f.path, f.mtime_ns, f.size, digests[f.path], tags)
+            if tags is not None:
+                by_path[f.path] = FileInfo(path=f.path, language=f.language, tags=tags)
+        pending = [f for f in files if f.path not in by_path]
+
+    parsed: Iterable[FileInfo]
+    if fast:
+        # Consumed as results arrive, so cache writes overlap later parses.
+        parsed = iter_parse_files_parallel(root, pending, max_size_bytes=max_size_bytes)
+    else:
+        parsed = _parse_files_sequential(root, pending)
+
+    pending_by_path = {f.path: f for f in pending} if tag_cache is not None else {}
+    for fi in parsed:
+        by_path[fi.path] = fi
+        digest = digests.get(fi.path)
+        if tag_cache is not None and digest is not None:
+            f = pending_by_path[fi.path]
+            tag_cache.put(f.path, f.mtime_ns, f.size, digest, fi.tags)
+
+    return [by_path[f.path] for f in files if f.path in by_path]
+
+
+def _parse_files_sequential(root: Path, files: list[DiscoveredFile]) -> list[FileInfo]:
     """Parse files sequentially, skipping files that fail to parse."""
     file_infos: list[FileInfo] = []
-    for rel_path, lang_name in files:
+    for rel_path, lang_name, size, _ in files:
+        if size == 0:
+            file_infos.append(FileInfo(path=rel_path, language=lang_name))
+            continue
         abs_path = root / rel_path
         lang_config = LANGUAGES[lang_name]
         try:
@@ -132,6 +221,27 @@ def main(
             help="Skip files larger than this many bytes (default: 1MB).",
         ),
     ] = _DEFAULT_MAX_FILE_SIZE,
+    fast: Annotated[
+        bool,
+        typer.Option(
+            "--fast",
+            help="Parse files in parallel across CPU cores.",
+        ),
+    ] = False,
+    tag_cache: Annotated[
+        Path | None,
+        typer.Option(
+            "--tag-cache",
+            help="Per-file tag cache database; unchanged files skip re-parsing.",
+        ),
+    ] = None,
+    tracked_only: Annotated[
+        bool,
+        typer.Option(
+            "--tracked-only",
+            help="Only map files tracked by git; skips scanning for untracked files.",
+        ),
+    ] = False,
     _version: Annotated[
         bool | None,
         typer.Option(
@@ -152,21 +262,24 @@ def main(
         )
         raise typer.Exit(1)
 
-    files = discover_files(root, language_filter=language)
+    files = discover_files(root, language_filter=language, tracked_only=tracked_only)
     if not files:
         typer.echo("No parseable files found.", err=True)
         raise typer.Exit(1)
 
-    if cache and _cache_is_fresh(cache, root, files):
+    if cache and _cache_is_fresh(cache, files):
         typer.echo(cache.read_text("utf-8"), nl=False)
         return
 
-    files = _filter_by_size(root, files, max_file_size)
-    if not files:
+    to_parse = _filter_by_size(files, max_file_size)
+    if not to_parse:
         typer.echo("No parseable files found (all exceeded size limit).", err=True)
         raise typer.Exit(1)
 
-    file_infos = _parse_files_sequential(root, files)
+    with TagCache(tag_cache) if tag_cache else nullcontext() as db:
+        file_infos = _parse_files(
+            root, to_parse, fast=fast, max_size_bytes=max_file_size, tag_cache=db
+        )
 
     if not file_infos:
         typer.echo("No files could be parsed.", err=True)
@@ -184,7 +297,10 @@ def main(
 
     repo_map = select_files(repo_map, max_files=max_files)
 
-    output = encode(repo_map)
     if cache:
-        cache.write_text(output + "\n", "utf-8")
-    typer.echo(output)
+        _write_cache(cache, repo_map)
+        with cache.open(encoding="utf-8") as f:
+            shutil.copyfileobj(f, sys.stdout)
+    else:
+        dump(repo_map, sys.stdout)
+        sys.stdout.write("\n")
@@ -2,13 +2,31 @@
 
 from __future__ import annotations
 
+import functools
+import itertools
+import operator
 import os
+import re
+import stat
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
 
 import pathspec
 
-from sourcecrumb.languages import language_for_extension
+from sourcecrumb.languages import extension_map
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping, Sequence
+
+    from sourcecrumb.languages import TreeSitterLanguage
+
+    # True: ignored; False: re-included by a "!" rule; None: no rule matched.
+    type _Matcher = Callable[[str], bool | None]
+    # (directory prefix, matcher) for each .gitignore from the root down.
+    type _Ignores = tuple[tuple[str, _Matcher], ...]
+    type _Found = tuple[str, str, os.DirEntry[str]]
 
 SKIP_DIRS: frozenset[str] = frozenset(
     {
@@ -27,16 +45,35 @@ SKIP_DIRS: frozenset[str] = frozenset(
         ".mypy_cache",
         ".ruff_cache",
         ".pytest_cache",
-        "egg-info",
     }
 )
 
+# Directory name endings that are skipped like SKIP_DIRS (e.g. "pkg.egg-info").
+_SKIP_DIR_SUFFIXES: tuple[str, ...] = (".egg-info",)
+
+
+# Tracked-file sets by root, stamped with the git index's (mtime_ns, size).
+_tracked_files_cache: dict[str, tuple[tuple[int, int], frozenset[str]]] = {}
+
 
-def _git_ls_files(root: Path) -> set[str] | None:
+def _git_ls_files(
+    root: Path, *, include_untracked: bool = True
+) -> frozenset[str] | None:
     """Return the set of git-tracked and untracked-but-not-ignored files.
 
-    Uses ``git ls-files --cached --others --exclude-standard`` to respect
-    all gitignore files (root, subdirectory, and global).
+    Uses ``git ls-files -z --cached --others --exclude-standard`` to respect
+    all gitignore files (root, subdirectory, and global). Output is read as
+    NUL-delimited bytes so names containing newlines survive, and decoded
+    with os.fsdecode to match the names os.scandir yields.
+
+    The tracked-only listing depends on nothing but the index, so it is
+    cached per root until the index file changes. The full listing also
+    reflects untracked files in the working tree and is never cached.
+
+    Args:
+        root: Repository root directory.
+        include_untracked: Also list untracked files. When False only the
+            index is read (``--cached``), skipping git's working-tree scan.
 
     Returns:
         Set of repo-relative file paths, or None if git is unavailable
@@ -44,12 +81,55 @@ def _git_ls_files(root: Path) -> set[str] | None:
     """
     if not (root / ".git").exists():
         return None
+    if include_untracked:
+        return _run_git_ls_files(root, ["--cached", "--others", "--exclude-standard"])
+
+    try:
+        # Absent when .git is a file (worktrees, submodules); just don't cache.
+        index = (root / ".git" / "index").stat()
+    except OSError:
+        return _run_git_ls_files(root, ["--cached"])
+    key, stamp = str(root), (index.st_mtime_ns, index.st_size)
+    cached = _tracked_files_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    files = _run_git_ls_files(root, ["--cached"])
+    if files is not None:
+        _tracked_files_cache[key] = (stamp, files)
+    return files
+
+
+def _git_listing(
+    root: Path, *, include_untracked: bool
+) -> tuple[frozenset[str], frozenset[str]] | None:
+    """Return git's file set and the set of directories containing them.
+
+    Returns:
+        Tuple of (files, directories) as root-relative POSIX strings, or
+        None if git is unavailable.
+    """
+    files = _git_ls_files(root, include_untracked=include_untracked)
+    if files is None:
+        return None
+    dirs: set[str] = set()
+    for path in files:
+        cut = path.rfind("/")
+        while cut > 0:
+            parent = path[:cut]
+            if parent in dirs:
+                break  # Its ancestors were added along with it.
+            dirs.add(parent)
+            cut = path.rfind("/", 0, cut)
+    return files, frozenset(dirs)
+
+
+def _run_git_ls_files(root: Path, args: list[str]) -> frozenset[str] | None:
+    """Run ``git ls-files -z`` with args in root and parse its output."""
     try:
         result = subprocess.run(
-            ["git", "ls-files", "--cached", "--others", "--exclude-standard"],
+            ["git", "ls-files", "-z", *args],
             cwd=root,
             capture_output=True,
-            text=True,
             timeout=10,
             check=False,
         )
@@ -57,78 +137,367 @@ def _git_ls_files(root: Path) -> set[str] | None:
         return None
     if result.returncode != 0:
         return None
-    return set(result.stdout.splitlines())
+    # One decode for the whole listing; NUL never occurs inside an encoded
+    # character, so splitting afterwards gives the same names.
+    return frozenset(os.fsdecode(result.stdout).split("\0")[:-1])
+
+
+class DiscoveredFile(NamedTuple):
+    """A parseable file found during discovery, with its stat metadata."""
+
+    path: Path
+    language: str
+    size: int
+    mtime_ns: int
 
 
 def discover_files(
     root: Path,
     *,
-    extra_ignores: list[str] | None = None,
+    extra_ignores: Sequence[str] | None = None,
     language_filter: str | None = None,
-) -> list[tuple[Path, str]]:
-    """Walk root and return (relative_path, language_name) for parseable files.
+    tracked_only: bool = False,
+) -> list[DiscoveredFile]:
+    """Walk root and return the parseable files beneath it.
+
+    ``git ls-files`` runs on a background thread while top-level
+    directories are walked in parallel. Once it answers, directories it
+    lists no files under are no longer entered, and its file set filters
+    the walk's candidates once both have finished. Without git, each
+    directory's .gitignore is applied as the walk descends into it. Each
+    surviving file is stat'd exactly once, so callers can use the recorded
+    size and mtime instead of stat'ing again.
 
     Args:
         root: Repository root directory.
         extra_ignores: Additional gitignore-style patterns to exclude.
         language_filter: If set, only return files matching this language name.
+        tracked_only: Skip untracked files when git is available. Without
+            git this has no effect.
 
     Returns:
-        List of (relative_path, language_name) tuples, sorted by path.
+        List of DiscoveredFile (path relative to root, language name, size,
+        mtime), sorted by path.
     """
-    git_files = _git_ls_files(root)
-    gitignore = _load_gitignore(root) if git_files is None else None
-
-    extra_spec = None
+    extra_ignored = None
     if extra_ignores:
-        extra_spec = pathspec.PathSpec.from_lines("gitignore", extra_ignores)
+        extra_ignored = _compiled_extra_spec(tuple(extra_ignores))
+
+    # In a git checkout git decides what is ignored (tracked files inside an
+    # ignored directory still count), so only prune by .gitignore without one.
+    use_gitignore = not (root / ".git").exists()
 
-    results: list[tuple[Path, str]] = []
+    # One extra worker so the git subprocess never starves the walkers.
+    with ThreadPoolExecutor(max_workers=(os.process_cpu_count() or 1) + 1) as pool:
+        git_job = pool.submit(_git_listing, root, include_untracked=not tracked_only)
 
-    for dirpath, dirnames, filenames in os.walk(root, followlinks=False):
-        # Prune skip dirs and hidden dirs in-place to prevent descent
-        dirnames[:] = sorted(
-            d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")
+        def listed_dirs() -> frozenset[str] | None:
+            # Once git has answered, directories it lists nothing under can
+            # be pruned; until then the walk proceeds unassisted.
+            if not git_job.done():
+                return None
+            listing = git_job.result()
+            return None if listing is None else listing[1]
+
+        candidates = _walk(
+            root,
+            pool,
+            use_gitignore,
+            extra_ignored,
+            extension_map(language_filter),
+            listed_dirs,
         )
+        listing = git_job.result()
 
-        rel_dir = Path(dirpath).relative_to(root)
+    if listing is not None:
+        git_files = listing[0]
+        candidates = [c for c in candidates if c[0] in git_files]
+    elif not use_gitignore:
+        # A checkout whose git call failed: fall back to the root .gitignore.
+        gitignored = _load_gitignore(root)
+        if gitignored is not None:
+            candidates = [c for c in candidates if not gitignored(c[0])]
 
-        for fname in sorted(filenames):
-            if fname.startswith("."):
-                continue
+    results: list[DiscoveredFile] = []
+    for rel_str, lang_name, entry in candidates:
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        results.append(
+            DiscoveredFile(Path(rel_str), lang_name, st.st_size, st.st_mtime_ns)
+        )
+    return results
 
-            full_path = Path(dirpath) / fname
-            if full_path.is_symlink():
-                continue
 
-            rel = rel_dir / fname
+class _Subdir(NamedTuple):
+    """A directory still to be scanned, with its root-relative prefix."""
 
-            if git_files is not None:
-                if str(rel) not in git_files:
-                    continue
-            elif gitignore and gitignore.match_file(str(rel)):
-                continue
+    path: str
+    prefix: str
+    ignores: _Ignores = ()
 
-            if extra_spec and extra_spec.match_file(str(rel)):
-                continue
 
-            lang = language_for_extension(Path(fname).suffix)
-            if lang is None:
-                continue
+def _walk(
+    root: Path,
+    pool: ThreadPoolExecutor,
+    use_gitignore: bool,
+    extra_ignored: _Matcher | None,
+    languages: Mapping[str, TreeSitterLanguage],
+    listed_dirs: Callable[[], frozenset[str] | None],
+) -> list[_Found]:
+    """Scan root for files with a known language, pruning ignored directories.
+
+    The root is scanned on the calling thread and each top-level directory
+    is then walked on the pool. os.scandir releases the GIL while reading
+    directory entries, so independent subtrees overlap their I/O.
+
+    Returns:
+        (relative path, language name, dir entry) tuples in Path sort order.
+    """
+    scan = functools.partial(
+        _scan_dir,
+        use_gitignore=use_gitignore,
+        extra_ignored=extra_ignored,
+        languages=languages,
+        suffixes=tuple(languages),
+        listed_dirs=listed_dirs,
+    )
+    top = scan(str(root), "", ())
+    subtrees = pool.map(
+        functools.partial(_walk_tree, scan),
+        [item for item in top if isinstance(item, _Subdir)],
+    )
+    found: list[_Found] = []
+    for item in top:
+        if isinstance(item, _Subdir):
+            found.extend(next(subtrees))
+        else:
+            found.append(item)
+    return found
+
+
+def _walk_tree(
+    scan: Callable[[str, str, _Ignores], list[_Found | _Subdir]],
+    top: _Subdir,
+) -> list[_Found]:
+    """Walk the directory tree under top depth-first, in Path sort order."""
+    found: list[_Found] = []
+    stack: list[_Found | _Subdir] = [top]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, _Subdir):
+            # Reversed so the stack pops entries in name order.
+            stack.extend(reversed(scan(*item)))
+        else:
+            found.append(item)
+    return found
+
+
+def _scan_dir(
+    dir_path: str,
+    prefix: str,
+    ignores: _Ignores,
+    *,
+    use_gitignore: bool,
+    extra_ignored: _Matcher | None,
+    languages: Mapping[str, TreeSitterLanguage],
+    suffixes: tuple[str, ...],
+    listed_dirs: Callable[[], frozenset[str] | None],
+) -> list[_Found | _Subdir]:
+    """List one directory's parseable files and the subdirectories to descend.
+
+    languages maps each wanted extension to its config, already narrowed to
+    the language filter, so one lookup decides both; suffixes holds its
+    keys so most other files are rejected by a single endswith call. With
+    use_gitignore, the directory's own .gitignore is added to the inherited
+    ignores.
+
+    listed_dirs returns the directories git listed files under, or None if
+    that is not known (yet).
 
-            if language_filter and lang.name != language_filter:
+    Returns:
+        Found files and subdirectories, sorted by name. Visiting them in
+        this order, descending into each subdirectory where it appears,
+        yields paths in Path sort order without a final sort.
+    """
+    keyed: list[tuple[str, _Found | _Subdir]] = []
+    # Like os.walk, a directory that cannot be listed is skipped.
+    try:
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+    except OSError:
+        return []
+
+    if use_gitignore:
+        own = _dir_gitignore(entries)
+        if own is not None:
+            ignores = (*ignores, (prefix, own))
+
+    git_dirs = listed_dirs()
+    for entry in entries:
+        name = entry.name
+        if name.startswith("."):
+            continue
+        rel_str = prefix + name
+
+        # Both checks use the d_type scandir already read. Without
+        # following links, symlinks are neither, so they are skipped, as
+        # are FIFOs and sockets that would block or fail when opened.
+        # Where d_type is unknown they lstat, which fails if the entry
+        # vanished mid-walk; such entries are skipped too.
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            is_file = not is_dir and entry.is_file(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            # Git never re-includes files beneath an excluded directory.
+            dir_rel = f"{rel_str}/"
+            if (
+                name in SKIP_DIRS
+                or name.endswith(_SKIP_DIR_SUFFIXES)
+                or _is_ignored(ignores, dir_rel)
+                or (extra_ignored and extra_ignored(dir_rel))
+                or (git_dirs is not None and rel_str not in git_dirs)
+            ):
                 continue
+            keyed.append((name, _Subdir(entry.path, dir_rel, ignores)))
+            continue
+        if not is_file:
+            continue
 
-            results.append((rel, lang.name))
+        # Cheap extension check first; most files stop here.
+        if not name.endswith(suffixes):
+            continue
+        dot = name.rfind(".")
+        lang = languages.get(name[dot:]) if dot > 0 else None
+        if lang is None:
+            continue
 
-    results.sort()
-    return results
+        if (extra_ignored and extra_ignored(rel_str)) or _is_ignored(ignores, rel_str):
+            continue
+
+        keyed.append((name, (rel_str, lang.name, entry)))
+
+    keyed.sort(key=operator.itemgetter(0))
+    return [item for _, item in keyed]
 
 
-def _load_gitignore(root: Path) -> pathspec.PathSpec:
-    """Load .gitignore from root, returning a PathSpec matcher."""
+def _is_ignored(ignores: _Ignores, rel_str: str) -> bool:
+    """Check a root-relative path against nested .gitignore matchers.
+
+    As in git, the deepest .gitignore with a rule matching the path decides;
+    each matcher sees the path relative to its own directory.
+    """
+    for base, matcher in reversed(ignores):
+        verdict = matcher(rel_str[len(base) :])
+        if verdict is not None:
+            return verdict
+    return False
+
+
+def _dir_gitignore(entries: list[os.DirEntry[str]]) -> _Matcher | None:
+    """Compile a directory's .gitignore, located among its scandir entries.
+
+    Finding it in the listing already read costs no syscall when the
+    directory has none, which is the common case.
+    """
+    for entry in entries:
+        if entry.name == ".gitignore":
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    return None
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                return None
+            return _compiled_gitignore(entry.path, st.st_mtime_ns, st.st_size)
+    return None
+
+
+def _load_gitignore(root: Path) -> _Matcher | None:
+    """Load .gitignore from root, returning a matcher or None if it is empty.
+
+    The compiled matcher is cached on the file's mtime and size, so repeated
+    discovery runs only re-parse it after an edit.
+    """
     gitignore_path = root / ".gitignore"
-    if gitignore_path.is_file():
-        lines = gitignore_path.read_text(encoding="utf-8").splitlines()
-        return pathspec.PathSpec.from_lines("gitignore", lines)
-    return pathspec.PathSpec.from_lines("gitignore", [])
+    try:
+        st = gitignore_path.stat()
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return _compiled_gitignore(str(gitignore_path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled_gitignore(path: str, mtime_ns: int, size: int) -> _Matcher | None:
+    """Parse and compile a .gitignore file; mtime_ns and size key the cache.
+
+    Undecodable bytes are kept as surrogate escapes, as os.scandir does for
+    names, so such patterns still match the names they were written for. An
+    unreadable file is treated as absent.
+    """
+    try:
+        text = Path(path).read_text(encoding="utf-8", errors="surrogateescape")
+    except OSError:
+        return None
+    return _compile_matcher(text.splitlines())
+
+
+@functools.lru_cache(maxsize=16)
+def _compiled_extra_spec(patterns: tuple[str, ...]) -> _Matcher | None:
+    """Compile gitignore-style patterns, reusing the result for equal input."""
+    return _compile_matcher(patterns)
+
+
+# Opening of a named group, e.g. pathspec 0.12's "(?P<ps_d>/)" in directory
+# patterns. An escaped literal "(?P<" reads "\(\?P<" and is not matched.
+_NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+
+
+def _anonymous(pattern: str) -> str:
+    """Make a pattern's named groups non-capturing.
+
+    A group name may appear only once per regex, so patterns that name their
+    groups could not otherwise share an alternation. Only match/no-match is
+    used, never the groups themselves.
+    """
+    return _NAMED_GROUP.sub("(?:", pattern)
+
+
+def _compile_matcher(lines: Iterable[str]) -> _Matcher | None:
+    """Build a matcher reporting how gitignore lines treat a path.
+
+    Consecutive patterns of the same sign (ignore or ``!`` re-include) are
+    folded into one alternation each. Under "last match wins", the last run
+    that matches decides the outcome, so the runs are tried from the end.
+    Typically there are only one or two runs, so a path costs one or two
+    regex calls instead of pathspec's per-pattern loop.
+
+    Returns:
+        The matcher, or None if the lines contain no patterns. The matcher
+        returns True if the path is ignored, False if a ``!`` rule
+        re-includes it, and None if no rule matches.
+    """
+    spec = pathspec.PathSpec.from_lines("gitignore", lines)
+    patterns = [p for p in spec.patterns if p.include is not None]
+    if not patterns:
+        return None
+    runs = [
+        (include, re.compile("|".join(_anonymous(p.regex.pattern) for p in run)))
+        for include, run in itertools.groupby(patterns, key=lambda p: p.include)
+    ]
+    if len(runs) == 1 and runs[0][0]:
+        combined = runs[0][1]
+        return lambda path: True if combined.match(path) else None
+    runs.reverse()
+
+    def matcher(path: str) -> bool | None:
+        for include, regex in runs:
+            if regex.match(path):
+                return include
+        return None
+
+    return matcher
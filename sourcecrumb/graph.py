@@ -2,21 +2,57 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
-from pathlib import Path
+import operator
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-import networkx as nx
+import numpy as np
+import scipy.sparse as sp
 
 from sourcecrumb.models import Dependency, FileInfo, TagKind
 
+if TYPE_CHECKING:
+    from collections.abc import KeysView
+    from pathlib import Path
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class FileGraph:
+    """Weighted file dependency graph in compressed sparse row (CSR) form.
+
+    Node ids are indices into paths. The out-edges of node i are
+    indices[indptr[i]:indptr[i + 1]], sorted by target id, with the matching
+    entries of weights. Edges and weights are plain int32 arrays rather than
+    per-edge Python objects. Graphs compare and hash by identity, since
+    array fields have no single truth value.
+    """
+
+    paths: list[Path]
+    path_to_id: dict[Path, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def nodes(self) -> KeysView[Path]:
+        """The file paths in the graph, supporting ``in`` checks."""
+        return self.path_to_id.keys()
+
+    def number_of_edges(self) -> int:
+        """Return the number of (source, target) edges."""
+        return len(self.indices)
+
 
 def build_graph(
     file_infos: list[FileInfo],
-) -> tuple[nx.MultiDiGraph, list[Dependency]]:
+) -> tuple[FileGraph, list[Dependency]]:
     """Build a dependency graph from extracted tags.
 
     Nodes are file paths. An edge from file A to file B exists when file A
-    contains a reference to a symbol defined in file B.
+    contains a reference to a symbol defined in file B; its weight is the
+    number of such references, so a symbol used many times counts for more
+    than one used once.
 
     Args:
         file_infos: List of FileInfo with extracted tags.
@@ -24,39 +60,55 @@ def build_graph(
     Returns:
         Tuple of (graph, dependencies list).
     """
-    defines: dict[str, set[Path]] = defaultdict(set)
-    for fi in file_infos:
-        for tag in fi.tags:
-            if tag.kind == TagKind.DEFINITION:
-                defines[tag.name].add(fi.path)
-
-    graph = nx.MultiDiGraph()
-    for fi in file_infos:
-        graph.add_node(fi.path)
-
-    edge_symbols: dict[tuple[Path, Path], list[str]] = defaultdict(list)
-
-    for fi in file_infos:
-        for tag in fi.tags:
-            if tag.kind != TagKind.REFERENCE:
+    # Files are keyed by their index in file_infos; Paths are only looked up
+    # again when emitting graph nodes and Dependency objects.
+    paths = [fi.path for fi in file_infos]
+
+    defines: dict[str, set[int]] = defaultdict(set)
+    for i, fi in enumerate(file_infos):
+        for tag in fi.definitions:
+            defines[tag.name].add(i)
+
+    edge_symbols: dict[tuple[int, int], set[str]] = defaultdict(set)
+    edge_weights: dict[tuple[int, int], int] = defaultdict(int)
+
+    for i, fi in enumerate(file_infos):
+        # Each distinct name is looked up once; its count weights the edges.
+        referenced = Counter(
+            tag.name for tag in fi.tags if tag.kind is TagKind.REFERENCE
+        )
+        for name, count in referenced.items():
+            def_ids = defines.get(name)
+            if def_ids is None:
                 continue
-            for def_file in sorted(defines.get(tag.name, set())):
-                if def_file == fi.path:
-                    continue
-                graph.add_edge(fi.path, def_file, symbol=tag.name)
-                if tag.name not in edge_symbols[(fi.path, def_file)]:
-                    edge_symbols[(fi.path, def_file)].append(tag.name)
+            for j in def_ids:
+                if j != i:
+                    edge_symbols[(i, j)].add(name)
+                    edge_weights[(i, j)] += count
+
+    # Sorted by (source, target), so the edges are already in CSR order.
+    edges = sorted(edge_symbols.items())
+    n, m = len(paths), len(edges)
+    sources = np.fromiter((i for (i, _), _ in edges), np.int32, m)
+    indptr = np.zeros(n + 1, np.int32)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    graph = FileGraph(
+        paths=paths,
+        path_to_id={path: i for i, path in enumerate(paths)},
+        indptr=indptr,
+        indices=np.fromiter((j for (_, j), _ in edges), np.int32, m),
+        weights=np.fromiter((edge_weights[e] for e, _ in edges), np.int32, m),
+    )
 
     dependencies = [
-        Dependency(source=src, target=tgt, symbols=syms)
-        for (src, tgt), syms in edge_symbols.items()
+        Dependency(source=paths[i], target=paths[j], symbols=sorted(syms))
+        for (i, j), syms in edges
     ]
-
     return graph, dependencies
 
 
 def rank_files(
-    graph: nx.MultiDiGraph,
+    graph: FileGraph,
     file_infos: list[FileInfo],
 ) -> None:
     """Apply PageRank to the graph and update file_infos in place.
@@ -65,7 +117,7 @@ def rank_files(
     by rank descending.
 
     Args:
-        graph: The dependency MultiDiGraph.
+        graph: The weighted dependency graph.
         file_infos: List of FileInfo to update in place.
     """
     if graph.number_of_edges() == 0:
@@ -73,8 +125,53 @@ def rank_files(
         for fi in file_infos:
             fi.rank = uniform
     else:
-        ranks = nx.pagerank(graph, alpha=0.85)
+        # tolist() converts every score to a Python float in one call.
+        scores = _pagerank(graph, alpha=0.85).tolist()
+        path_to_id = graph.path_to_id
         for fi in file_infos:
-            fi.rank = ranks.get(fi.path, 0.0)
+            i = path_to_id.get(fi.path)
+            fi.rank = scores[i] if i is not None else 0.0
+
+    file_infos.sort(key=operator.attrgetter("rank"), reverse=True)
+
+
+def _pagerank(
+    graph: FileGraph,
+    *,
+    alpha: float = 0.85,
+    max_iter: int = 100,
+    tol: float = 1.0e-6,
+) -> np.ndarray:
+    """Compute PageRank by sparse power iteration.
 
-    file_infos.sort(key=lambda fi: fi.rank, reverse=True)
+    Mirrors ``networkx.pagerank`` semantics: out-links are followed in
+    proportion to their weight, dangling nodes redistribute uniformly, and
+    convergence is reached when the L1 change drops below ``n * tol``.
+
+    Args:
+        graph: The weighted dependency graph.
+        alpha: Damping factor.
+        max_iter: Maximum number of power iterations.
+        tol: Per-node convergence tolerance.
+
+    Returns:
+        Array of PageRank scores indexed by node id, summing to 1.
+    """
+    n = len(graph.paths)
+    rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(graph.indptr))
+    out_degree = np.bincount(rows, weights=graph.weights, minlength=n)
+    dangling = out_degree == 0
+    inv_out = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    # Row-normalized adjacency over the graph's own CSR arrays; its
+    # transpose (a CSC view, no copy) pulls rank from each node's referrers.
+    matrix = sp.csr_matrix(
+        (graph.weights * inv_out[rows], graph.indices, graph.indptr), shape=(n, n)
+    ).T
+
+    v = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        prev = v
+        v = alpha * (matrix @ prev) + (alpha * prev[dangling].sum() + 1 - alpha) / n
+        if np.abs(v - prev).sum() < n * tol:
+            break
+    return v
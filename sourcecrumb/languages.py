@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-import functools
+import threading
 from dataclasses import dataclass
 from importlib import resources
 from typing import TYPE_CHECKING
@@ -10,6 +10,8 @@ from typing import TYPE_CHECKING
 from tree_sitter_language_pack import get_language, get_parser
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from tree_sitter import Language, Parser, Query
 
 
@@ -18,20 +20,42 @@ EXTENSION_MAP: dict[str, str] = {
 }
 
 
-@functools.cache
+# Strong per-process query cache. Workers forked after it is filled inherit
+# it, so they skip loading the .scm file and compiling the query. Compiled
+# queries are immutable and safe to share; parsers are not, so each thread
+# keeps its own.
+_TAG_QUERIES: dict[str, Query] = {}
+_TAG_QUERIES_LOCK = threading.Lock()
+_thread_state = threading.local()
+
+
 def _cached_parser(name: str) -> Parser:
-    """Return a cached tree-sitter Parser for the given language."""
-    return get_parser(name)
+    """Return this thread's cached tree-sitter Parser for the given language."""
+    parsers: dict[str, Parser] = _thread_state.__dict__.setdefault("parsers", {})
+    parser = parsers.get(name)
+    if parser is None:
+        parser = parsers[name] = get_parser(name)
+    return parser
 
 
-@functools.cache
 def _cached_tag_query(name: str) -> Query:
-    """Return a cached compiled tag query for the given language."""
-    from tree_sitter import Query as TSQuery
+    """Return a cached compiled tag query for the given language.
+
+    The lock is only taken on a miss, so parse threads that start together
+    compile each query once instead of racing to build duplicates.
+    """
+    query = _TAG_QUERIES.get(name)
+    if query is not None:
+        return query
+    with _TAG_QUERIES_LOCK:
+        query = _TAG_QUERIES.get(name)
+        if query is None:
+            from tree_sitter import Query as TSQuery
 
-    scm_text = _load_query_file(name)
-    lang = get_language(name)
-    return TSQuery(lang, scm_text)
+            scm_text = _load_query_file(name)
+            lang = get_language(name)
+            query = _TAG_QUERIES[name] = TSQuery(lang, scm_text)
+    return query
 
 
 @dataclass(frozen=True)
@@ -75,6 +99,12 @@ def _load_query_file(language_name: str) -> str:
     return query_path.read_text(encoding="utf-8")
 
 
+# EXTENSION_MAP resolved to configs up front, so lookups are a single probe.
+_EXT_TO_LANG: dict[str, TreeSitterLanguage] = {
+    ext: LANGUAGES[name] for ext, name in EXTENSION_MAP.items()
+}
+
+
 def language_for_extension(ext: str) -> TreeSitterLanguage | None:
     """Look up a language config by file extension.
 
@@ -84,7 +114,20 @@ def language_for_extension(ext: str) -> TreeSitterLanguage | None:
     Returns:
         The TreeSitterLanguage config, or None if unsupported.
     """
-    lang_name = EXTENSION_MAP.get(ext)
-    if lang_name is None:
-        return None
-    return LANGUAGES.get(lang_name)
+    return _EXT_TO_LANG.get(ext)
+
+
+def extension_map(language_name: str | None = None) -> Mapping[str, TreeSitterLanguage]:
+    """Return the extension-to-language lookup, optionally for one language.
+
+    Args:
+        language_name: If set, keep only this language's extensions.
+
+    Returns:
+        Mapping from extension (including the dot) to language config.
+    """
+    if language_name is None:
+        return _EXT_TO_LANG
+    return {
+        ext: lang for ext, lang in _EXT_TO_LANG.items() if lang.name == language_name
+    }
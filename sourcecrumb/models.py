@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import enum
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 
 
@@ -23,7 +24,7 @@ class SymbolKind(enum.Enum):
     MODULE = "module"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Tag:
     """A single symbol occurrence extracted from source code."""
 
@@ -34,18 +35,39 @@ class Tag:
     file: Path
     signature: str = ""
 
+    def __setstate__(self, state: list[object]) -> None:
+        """Restore a pickled Tag, interning its name in this process.
 
-@dataclass
+        Tags arrive pickled from parse worker processes and the tag cache;
+        pickle does not intern strings, so without this their names would
+        lose the identity comparisons build_graph's dict probes rely on.
+        """
+        for f, value in zip(fields(self), state, strict=True):
+            object.__setattr__(self, f.name, value)
+        object.__setattr__(self, "name", sys.intern(self.name))
+
+
+@dataclass(slots=True)
 class FileInfo:
-    """Metadata and extracted tags for a single source file."""
+    """Metadata and extracted tags for a single source file.
+
+    ``definitions`` is derived from ``tags`` at construction time so that
+    consumers needing only definitions skip the per-tag kind check. Treat
+    ``tags`` as read-only afterwards; use dataclasses.replace to get a
+    FileInfo with different tags.
+    """
 
     path: Path
     language: str
     tags: list[Tag] = field(default_factory=list)
     rank: float = 0.0
+    definitions: list[Tag] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.definitions = [t for t in self.tags if t.kind is TagKind.DEFINITION]
 
 
-@dataclass
+@dataclass(slots=True)
 class Dependency:
     """An edge in the dependency graph: source references symbols defined in target."""
 
@@ -54,7 +76,7 @@ class Dependency:
     symbols: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class RepoMap:
     """The complete analyzed repository map, ready for serialization."""
 
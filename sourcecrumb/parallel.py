@@ -0,0 +1,212 @@
+"""Parallel tag extraction across thread or process pools."""
+
+from __future__ import annotations
+
+import functools
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import typer
+
+from sourcecrumb.languages import LANGUAGES
+from sourcecrumb.models import FileInfo
+from sourcecrumb.parsing import extract_tags
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from concurrent.futures import Executor, Future
+
+    from sourcecrumb.discovery import DiscoveredFile
+
+
+# Fork skips re-importing the package in every worker. Only used on Linux,
+# where forking a process without live threads is safe.
+_MP_CONTEXT = multiprocessing.get_context("fork" if sys.platform == "linux" else None)
+
+# Below this many files, auto mode uses threads rather than processes:
+# tree-sitter releases the GIL while parsing, and a thread pool pays no fork
+# or result-pickling cost. The cutoff is a conservative default, not a
+# measured crossover point.
+_THREAD_POOL_MAX_FILES = 2000
+
+# Below this many files, auto mode parses in-process: pool startup and
+# per-task dispatch would cost more than the parallelism recovers.
+_POOL_MIN_FILES = 32
+
+# Per-worker invariants, set once by _init_worker instead of pickled per task.
+_worker_root: Path
+_worker_max_size_bytes: int
+
+
+def _init_worker(root: Path, max_size_bytes: int, lang_names: tuple[str, ...]) -> None:
+    """Store per-run settings and make sure each language is compiled."""
+    global _worker_root, _worker_max_size_bytes
+    _worker_root = root
+    _worker_max_size_bytes = max_size_bytes
+    _warm_languages(lang_names)
+
+
+def _warm_languages(lang_names: Iterable[str]) -> None:
+    """Build each language's Parser and tag Query into the calling caches."""
+    for name in lang_names:
+        lang = LANGUAGES[name]
+        lang.get_parser()
+        lang.get_tag_query()
+
+
+def _parse_file_worker(
+    root: Path,
+    item: DiscoveredFile,
+    *,
+    max_size_bytes: int,
+) -> tuple[FileInfo | None, str | None]:
+    """Parse a single file, returning its FileInfo or a warning message.
+
+    Runs in-process, on a pool thread, or in a worker process. The language
+    config is looked up by name so it is never pickled across a process
+    boundary. The size recorded during discovery is trusted, so the file is
+    not stat'd again, and an empty file is not even opened.
+
+    Args:
+        root: Repository root directory.
+        item: The discovered file; its language names a key into LANGUAGES.
+        max_size_bytes: Skip files larger than this.
+
+    Returns:
+        Tuple of (file_info, warning); exactly one of the two is None.
+    """
+    rel_path, lang_name = item.path, item.language
+    if item.size > max_size_bytes:
+        return None, f"{rel_path}: skipped (>{max_size_bytes} bytes)"
+    if item.size == 0:
+        # Typically an empty __init__.py; there is nothing to open or parse.
+        return FileInfo(path=rel_path, language=lang_name), None
+    try:
+        tags = extract_tags(root / rel_path, LANGUAGES[lang_name])
+    except (OSError, UnicodeDecodeError) as exc:
+        return None, f"failed to parse {rel_path}: {exc}"
+    return FileInfo(path=rel_path, language=lang_name, tags=tags), None
+
+
+def _parse_in_worker(item: DiscoveredFile) -> tuple[FileInfo | None, str | None]:
+    """Run _parse_file_worker with the settings stored by _init_worker."""
+    return _parse_file_worker(_worker_root, item, max_size_bytes=_worker_max_size_bytes)
+
+
+def parse_files_parallel(
+    root: Path,
+    files: list[DiscoveredFile],
+    *,
+    max_size_bytes: int,
+    max_workers: int | None = None,
+    use_threads: bool | None = None,
+) -> list[FileInfo]:
+    """Parse files across a thread or process pool, preserving input order.
+
+    Collects iter_parse_files_parallel into a list; see there for details.
+
+    Returns:
+        List of FileInfo for successfully parsed files.
+    """
+    return list(
+        iter_parse_files_parallel(
+            root,
+            files,
+            max_size_bytes=max_size_bytes,
+            max_workers=max_workers,
+            use_threads=use_threads,
+        )
+    )
+
+
+def iter_parse_files_parallel(
+    root: Path,
+    files: list[DiscoveredFile],
+    *,
+    max_size_bytes: int,
+    max_workers: int | None = None,
+    use_threads: bool | None = None,
+) -> Iterator[FileInfo]:
+    """Parse files across a thread or process pool, yielding in input order.
+
+    Each result is yielded as soon as it and every earlier file are done,
+    so callers can consume results while later files are still parsing.
+    Files that are oversized or fail to parse are skipped with a warning on
+    stderr. Programming errors raised in a worker propagate to the caller.
+
+    Args:
+        root: Repository root directory.
+        files: Discovered files to parse.
+        max_size_bytes: Skip files larger than this.
+        max_workers: Worker count; defaults to the CPUs this process may use.
+        use_threads: Use a thread pool instead of a process pool. By
+            default, inputs smaller than _POOL_MIN_FILES are parsed
+            in-process and those smaller than _THREAD_POOL_MAX_FILES on
+            threads.
+
+    Yields:
+        FileInfo for each successfully parsed file.
+    """
+    if max_workers is None:
+        max_workers = min(os.process_cpu_count() or 1, len(files))
+    worker = functools.partial(_parse_file_worker, root, max_size_bytes=max_size_bytes)
+    if max_workers <= 1 or (use_threads is None and len(files) < _POOL_MIN_FILES):
+        yield from _collect(map(worker, files))
+        return
+
+    # Compile queries once up front: threads share them, and forked workers
+    # inherit them, so no worker starts by compiling.
+    lang_names = tuple(sorted({f.language for f in files}))
+    _warm_languages(lang_names)
+
+    if use_threads is None:
+        use_threads = len(files) < _THREAD_POOL_MAX_FILES
+    if use_threads:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from _collect(
+                _bounded_map(executor, worker, files, window=max_workers * 4)
+            )
+        return
+
+    chunksize = max(1, len(files) // (max_workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=_MP_CONTEXT,
+        initializer=_init_worker,
+        initargs=(root, max_size_bytes, lang_names),
+    ) as executor:
+        yield from _collect(executor.map(_parse_in_worker, files, chunksize=chunksize))
+
+
+def _bounded_map[T, R](
+    executor: Executor, fn: Callable[[T], R], items: Iterable[T], *, window: int
+) -> Iterator[R]:
+    """Like executor.map, but with at most window tasks in flight.
+
+    executor.map submits every item up front; this keeps memory bounded and
+    lets result handling start while later items are still being queued.
+    Results are yielded in input order.
+    """
+    in_flight: deque[Future[R]] = deque()
+    for item in items:
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+        in_flight.append(executor.submit(fn, item))
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def _collect(
+    results: Iterable[tuple[FileInfo | None, str | None]],
+) -> Iterator[FileInfo]:
+    """Yield parsed files from worker results, echoing warnings to stderr."""
+    for file_info, warning in results:
+        if warning is not None:
+            typer.echo(f"Warning: {warning}", err=True)
+        if file_info is not None:
+            yield file_info
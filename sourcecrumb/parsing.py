@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import mmap
+import os
+import re
+import sys
 from pathlib import Path
 
 from tree_sitter import Node, QueryCursor
@@ -16,6 +20,11 @@ _CAPTURE_MAP: dict[str, tuple[TagKind, SymbolKind]] = {
     "reference.import": (TagKind.REFERENCE, SymbolKind.MODULE),
 }
 
+_WHITESPACE = re.compile(r"\s+")
+
+# Slicing either type yields bytes, which is all the extractors rely on.
+type _Source = bytes | mmap.mmap
+
 
 def extract_tags(file_path: Path, language: TreeSitterLanguage) -> list[Tag]:
     """Parse a file and extract all definition and reference tags.
@@ -30,10 +39,33 @@ def extract_tags(file_path: Path, language: TreeSitterLanguage) -> list[Tag]:
     Raises:
         FileNotFoundError: If file_path does not exist.
     """
-    source = file_path.read_bytes()
-    if not source:
-        return []
+    # A raw descriptor is enough for mmap; no buffered file object needed.
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        try:
+            # mmap stats the descriptor itself, so no separate fstat.
+            source = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return []  # Empty file: mmap rejects it, and there is nothing to parse.
+        with source:
+            return _extract_from_source(source, file_path, language)
+    finally:
+        os.close(fd)
+
+
+def _extract_from_source(
+    source: _Source, file_path: Path, language: TreeSitterLanguage
+) -> list[Tag]:
+    """Extract tags from an in-memory source buffer.
+
+    Args:
+        source: The file contents (bytes or a read-only mmap).
+        file_path: Path recorded on each Tag.
+        language: The tree-sitter language configuration.
 
+    Returns:
+        List of Tag objects found in the source.
+    """
     parser = language.get_parser()
     tree = parser.parse(source)
     query = language.get_tag_query()
@@ -46,7 +78,9 @@ def extract_tags(file_path: Path, language: TreeSitterLanguage) -> list[Tag]:
         if not name_nodes:
             continue
         name_node = name_nodes[0]
-        name_text = name_node.text.decode("utf-8")
+        # Names repeat heavily across files; interning makes the dict probes
+        # in build_graph compare by identity.
+        name_text = sys.intern(_node_text(name_node, source))
 
         for capture_name, nodes in match_dict.items():
             if capture_name == "name":
@@ -58,19 +92,16 @@ def extract_tags(file_path: Path, language: TreeSitterLanguage) -> list[Tag]:
             def_node = nodes[0]
             effective_name = name_text
 
-            if (
-                tag_kind == TagKind.DEFINITION
-                and symbol_kind == SymbolKind.FUNCTION
-                and _is_method(def_node)
-            ):
-                symbol_kind = SymbolKind.METHOD
-                class_name = _get_enclosing_class_name(def_node)
-                if class_name:
-                    effective_name = f"{class_name}.{name_text}"
+            if tag_kind is TagKind.DEFINITION and symbol_kind is SymbolKind.FUNCTION:
+                is_method, class_name = _method_info(def_node, source)
+                if is_method:
+                    symbol_kind = SymbolKind.METHOD
+                    if class_name:
+                        effective_name = sys.intern(f"{class_name}.{name_text}")
 
             signature = ""
-            if tag_kind == TagKind.DEFINITION:
-                signature = _extract_signature(def_node, symbol_kind)
+            if tag_kind is TagKind.DEFINITION:
+                signature = _extract_signature(name_text, match_dict, source)
 
             tags.append(
                 Tag(
@@ -90,93 +121,79 @@ def _find_enclosing_class(func_node: Node) -> Node | None:
     """Return the enclosing class_definition node, or None if not inside a class.
 
     Handles both direct methods (func -> block -> class) and decorated methods
-    (func -> decorated_definition -> block -> class).
+    (func -> decorated_definition -> block -> class). Each ancestor is fetched
+    once, since every ``Node.parent`` access crosses into tree-sitter.
     """
     parent = func_node.parent
-    if parent is None:
+    if parent is not None and parent.type == "decorated_definition":
+        parent = parent.parent
+    if parent is None or parent.type != "block":
         return None
-    if (
-        parent.type == "block"
-        and parent.parent
-        and parent.parent.type == "class_definition"
-    ):
-        return parent.parent
-    if parent.type == "decorated_definition":
-        grandparent = parent.parent
-        if (
-            grandparent
-            and grandparent.type == "block"
-            and grandparent.parent
-            and grandparent.parent.type == "class_definition"
-        ):
-            return grandparent.parent
+    grandparent = parent.parent
+    if grandparent is not None and grandparent.type == "class_definition":
+        return grandparent
     return None
 
 
-def _get_enclosing_class_name(func_node: Node) -> str | None:
-    """Return the name of the enclosing class, or None if not inside a class."""
+def _method_info(func_node: Node, source: _Source) -> tuple[bool, str | None]:
+    """Classify a function_definition node in a single walk up its parents.
+
+    Returns:
+        Tuple of (is_method, enclosing class name or None).
+    """
     class_node = _find_enclosing_class(func_node)
     if class_node is None:
-        return None
-    for child in class_node.children:
-        if child.type == "identifier":
-            return child.text.decode("utf-8")
-    return None
-
+        return False, None
+    return True, _field_text(class_node, "name", source) or None
 
-def _is_method(func_node: Node) -> bool:
-    """Check if a function_definition node is a method (inside a class)."""
-    return _find_enclosing_class(func_node) is not None
 
+def _extract_signature(
+    name: str, match_dict: dict[str, list[Node]], source: _Source
+) -> str:
+    """Build a definition's signature from the query's signature captures.
 
-def _extract_signature(def_node: Node, symbol_kind: SymbolKind) -> str:
-    """Extract the signature string from a definition node.
+    The tag query captures the superclasses, parameters and return type
+    alongside the name, so no field lookups on the definition node are
+    needed and the already-decoded name is reused.
 
     Args:
-        def_node: The tree-sitter definition node (class_definition or
-            function_definition).
-        symbol_kind: The kind of symbol.
+        name: The definition's decoded name.
+        match_dict: The query match, keyed by capture name.
+        source: The source buffer the nodes were parsed from.
 
     Returns:
-        The signature string (e.g., "main(config: Config) -> None").
+        The signature string (e.g., "main(config: Config) -> None" or
+        "MyClass(Base, Mixin)").
     """
-    if symbol_kind == SymbolKind.CLASS:
-        return _extract_class_signature(def_node)
-    return _extract_function_signature(def_node)
-
-
-def _extract_class_signature(node: Node) -> str:
-    """Extract class signature like 'MyClass(Base, Mixin)'."""
-    name = ""
-    args = ""
-    for child in node.children:
-        if child.type == "identifier":
-            name = child.text.decode("utf-8")
-        elif child.type == "argument_list":
-            args = child.text.decode("utf-8")
-    return f"{name}{args}" if args else name
-
-
-def _extract_function_signature(node: Node) -> str:
-    """Extract function signature like 'run(self, config: Config) -> None'."""
-    name = ""
-    params = ""
-    return_type = ""
-    for child in node.children:
-        if child.type == "identifier":
-            name = child.text.decode("utf-8")
-        elif child.type == "parameters":
-            params = _collapse_whitespace(child.text.decode("utf-8"))
-        elif child.type == "type":
-            return_type = child.text.decode("utf-8")
-    sig = f"{name}{params}"
-    if return_type:
-        sig += f" -> {return_type}"
+    if superclasses := match_dict.get("signature.superclasses"):
+        return f"{name}{_node_text(superclasses[0], source)}"
+    params = match_dict.get("signature.parameters")
+    if params is None:
+        return name
+    sig = f"{name}{_collapse_whitespace(_node_text(params[0], source))}"
+    if return_type := match_dict.get("signature.return_type"):
+        sig += f" -> {_node_text(return_type[0], source)}"
     return sig
 
 
+def _field_text(node: Node, field_name: str, source: _Source) -> str:
+    """Return the text of a node's named field child, or "" if absent.
+
+    Field lookups go through the grammar's field table rather than scanning
+    every child.
+    """
+    child = node.child_by_field_name(field_name)
+    return "" if child is None else _node_text(child, source)
+
+
+def _node_text(node: Node, source: _Source) -> str:
+    """Decode a node's text by slicing the original source buffer.
+
+    Avoids ``Node.text``, which copies the bytes out of the tree first.
+    """
+    return source[node.start_byte : node.end_byte].decode("utf-8")
+
+
 def _collapse_whitespace(text: str) -> str:
     """Collapse multi-line whitespace into single spaces."""
-    import re
-
-    return re.sub(r"\s+", " ", text)
+    return _WHITESPACE.sub(" ", text)
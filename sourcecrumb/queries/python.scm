@@ -1,10 +1,13 @@
-;; Class definitions
+;; Class definitions; superclasses are captured for the signature
 (class_definition
-  name: (identifier) @name) @definition.class
+  name: (identifier) @name
+  superclasses: (argument_list)? @signature.superclasses) @definition.class
 
-;; Function/method definitions
+;; Function/method definitions; parameters and return type form the signature
 (function_definition
-  name: (identifier) @name) @definition.function
+  name: (identifier) @name
+  parameters: (parameters) @signature.parameters
+  return_type: (_)? @signature.return_type) @definition.function
 
 ;; Function and method calls
 (call
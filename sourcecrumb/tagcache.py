@@ -0,0 +1,163 @@
+"""Persistent per-file cache of extracted tags."""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import pickle
+import sqlite3
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from types import TracebackType
+
+    from sourcecrumb.models import Tag
+
+# Bump when the Tag layout or table schema changes; older caches are dropped.
+_SCHEMA_VERSION = 2
+
+
+class TagCache:
+    """SQLite-backed store of extracted tags, keyed by relative file path.
+
+    get() returns an entry only while the file's mtime and size still match
+    the values recorded when it was stored. When they do not (e.g. after a
+    checkout rewrote an unchanged file), get_by_digest() can still recover
+    the entry from a digest of the file's contents. Use as a context
+    manager; pending writes are committed on exit.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """Open (creating if needed) the cache database at db_path."""
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        # WAL lets concurrent runs read while one writes; NORMAL skips the
+        # per-commit fsync, and a lost entry only costs a re-parse.
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != _SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS tags")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tags ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " digest BLOB NOT NULL,"
+            " data BLOB NOT NULL)"
+        )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def get(self, rel_path: Path, mtime_ns: int, size: int) -> list[Tag] | None:
+        """Return cached tags for rel_path, or None if missing or stale.
+
+        Args:
+            rel_path: File path relative to the repository root.
+            mtime_ns: The file's current modification time in nanoseconds.
+            size: The file's current size in bytes.
+
+        Returns:
+            The cached tags, or None on a miss.
+        """
+        row = self._conn.execute(
+            "SELECT data FROM tags WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (rel_path.as_posix(), mtime_ns, size),
+        ).fetchone()
+        return None if row is None else _unpickle(row[0])
+
+    def get_by_digest(self, rel_path: Path, digest: bytes) -> list[Tag] | None:
+        """Return cached tags for rel_path if its contents are unchanged.
+
+        Args:
+            rel_path: File path relative to the repository root.
+            digest: Digest of the file's current contents (see file_digest).
+
+        Returns:
+            The cached tags, or None on a miss.
+        """
+        row = self._conn.execute(
+            "SELECT data FROM tags WHERE path = ? AND digest = ?",
+            (rel_path.as_posix(), digest),
+        ).fetchone()
+        return None if row is None else _unpickle(row[0])
+
+    def put(
+        self,
+        rel_path: Path,
+        mtime_ns: int,
+        size: int,
+        digest: bytes,
+        tags: list[Tag],
+    ) -> None:
+        """Store tags for rel_path, replacing any previous entry.
+
+        Args:
+            rel_path: File path relative to the repository root.
+            mtime_ns: The file's modification time in nanoseconds.
+            size: The file's size in bytes.
+            digest: Digest of the file's contents (see file_digest).
+            tags: The tags extracted from the file.
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tags (path, mtime_ns, size, digest, data)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (rel_path.as_posix(), mtime_ns, size, digest, pickle.dumps(tags)),
+        )
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self._conn.commit()
+        self._conn.close()
+
+
+def file_digest(path: Path) -> bytes:
+    """Return a digest of the file's contents for TagCache lookups.
+
+    The file is hashed straight from a read-only mapping, as extract_tags
+    parses it, rather than copied through a read buffer first.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        try:
+            contents = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return hashlib.blake2b().digest()  # mmap rejects empty files.
+        with contents:
+            return hashlib.blake2b(contents).digest()
+    finally:
+        os.close(fd)
+
+
+def _unpickle(data: bytes) -> list[Tag] | None:
+    """Decode a stored tag list, treating undecodable entries as misses.
+
+    ValueError and TypeError come from Tag.__setstate__ when an entry was
+    pickled with a different Tag layout.
+    """
+    try:
+        return pickle.loads(data)
+    except (
+        pickle.UnpicklingError,
+        AttributeError,
+        EOFError,
+        ImportError,
+        ValueError,
+        TypeError,
+    ):
+        return None
@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+import io
 import re
+from typing import TYPE_CHECKING, TextIO
 
-from sourcecrumb.models import RepoMap, TagKind
+from sourcecrumb.models import RepoMap
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
 
 _NEEDS_QUOTING = re.compile(r'[,:"\\{}\[\]]')
 _LOOKS_NUMERIC = re.compile(r"^-?(?:0|[1-9]\d*)(?:\.\d+)?$")
 _KEYWORDS = frozenset({"true", "false", "null"})
+# Identifiers, dotted names and paths: never need quoting unless a keyword.
+_SAFE = re.compile(r"[A-Za-z_][A-Za-z0-9_./-]*")
 
 
 def encode(repo_map: RepoMap) -> str:
@@ -20,67 +28,98 @@ def encode(repo_map: RepoMap) -> str:
     Returns:
         TOON-formatted string (no trailing newline).
     """
-    parts: list[str] = []
+    buf = io.StringIO()
+    dump(repo_map, buf)
+    return buf.getvalue()
 
-    parts.append(f"repo: {_encode_value(repo_map.repo_name)}")
-    parts.append(f"root: {_encode_value(repo_map.root.name)}")
 
-    file_rows = [[str(fi.path), fi.language, f"{fi.rank:.4f}"] for fi in repo_map.files]
-    parts.append(_format_tabular("files", ["path", "language", "rank"], file_rows))
+def dump(repo_map: RepoMap, out: TextIO) -> None:
+    """Stream a RepoMap in TOON format to a text file object.
 
-    symbol_rows: list[list[str]] = []
-    for fi in repo_map.files:
-        for tag in fi.tags:
-            if tag.kind == TagKind.DEFINITION:
-                symbol_rows.append(
-                    [
-                        str(fi.path),
-                        tag.name,
-                        tag.symbol_kind.value,
-                        str(tag.line),
-                        tag.signature,
-                    ]
-                )
-    parts.append(
-        _format_tabular(
-            "symbols",
-            ["file", "name", "kind", "line", "signature"],
-            symbol_rows,
-        )
+    Rows are written as they are produced, so the full document is never
+    held in memory.
+
+    Args:
+        repo_map: The repository map to encode.
+        out: Writable text stream. No trailing newline is written.
+    """
+    out.write(f"repo: {_encode_value(repo_map.repo_name)}\n")
+    out.write(f"root: {_encode_value(repo_map.root.name)}")
+
+    # Each path appears in many rows, so it is encoded once up front. Ranks,
+    # line numbers and symbol kinds are always bare-safe and bypass
+    # _encode_value entirely.
+    paths = {fi.path: _encode_value(str(fi.path)) for fi in repo_map.files}
+
+    _write_tabular(
+        out,
+        "files",
+        ["path", "language", "rank"],
+        len(repo_map.files),
+        (
+            [paths[fi.path], _encode_value(fi.language), f"{fi.rank:.4f}"]
+            for fi in repo_map.files
+        ),
     )
 
-    dep_rows = [
-        [str(d.source), str(d.target), " ".join(d.symbols)]
-        for d in repo_map.dependencies
-    ]
-    parts.append(
-        _format_tabular("dependencies", ["source", "target", "symbols"], dep_rows)
+    symbol_count = sum(len(fi.definitions) for fi in repo_map.files)
+    _write_tabular(
+        out,
+        "symbols",
+        ["file", "name", "kind", "line", "signature"],
+        symbol_count,
+        _symbol_rows(repo_map, paths),
     )
 
-    return "\n".join(parts)
+    _write_tabular(
+        out,
+        "dependencies",
+        ["source", "target", "symbols"],
+        len(repo_map.dependencies),
+        (
+            [
+                paths.get(d.source) or _encode_value(str(d.source)),
+                paths.get(d.target) or _encode_value(str(d.target)),
+                _encode_value(" ".join(d.symbols)),
+            ]
+            for d in repo_map.dependencies
+        ),
+    )
 
 
-def _format_tabular(
+def _symbol_rows(repo_map: RepoMap, paths: dict[Path, str]) -> Iterator[list[str]]:
+    """Yield encoded symbol rows for every definition tag."""
+    for fi in repo_map.files:
+        path = paths[fi.path]
+        for tag in fi.definitions:
+            yield [
+                path,
+                _encode_value(tag.name),
+                tag.symbol_kind.value,
+                str(tag.line),
+                _encode_value(tag.signature),
+            ]
+
+
+def _write_tabular(
+    out: TextIO,
     name: str,
     columns: list[str],
-    rows: list[list[str]],
-) -> str:
-    """Format a tabular array in TOON notation.
+    count: int,
+    rows: Iterable[list[str]],
+) -> None:
+    """Write a tabular array in TOON notation, preceded by a newline.
 
     Args:
+        out: Writable text stream.
         name: The array field name.
         columns: Column header names.
-        rows: List of row data (each row is list of strings).
-
-    Returns:
-        TOON tabular array string.
+        count: Number of rows that ``rows`` will yield.
+        rows: Row data as already-encoded cells.
     """
-    header = f"{name}[{len(rows)}]{{{','.join(columns)}}}:"
-    lines = [header]
+    out.write(f"\n{name}[{count}]{{{','.join(columns)}}}:")
     for row in rows:
-        encoded = [_encode_value(cell) for cell in row]
-        lines.append(f"  {','.join(encoded)}")
-    return "\n".join(lines)
+        out.write(f"\n  {','.join(row)}")
 
 
 def _encode_value(value: str) -> str:
@@ -92,6 +131,9 @@ def _encode_value(value: str) -> str:
     Returns:
         The value, possibly double-quoted with escapes applied.
     """
+    if _SAFE.fullmatch(value):
+        return _quote(value) if value.lower() in _KEYWORDS else value
+
     if not value:
         return '""'
 
@@ -76,7 +76,15 @@ def run() -> None:
 
 @pytest.fixture()
 def sample_file_infos() -> list[FileInfo]:
-    """Pre-built FileInfo objects with known tags for graph tests."""
+    """Pre-built FileInfo objects with known tags for graph tests.
+
+    Function-scoped because rank_files mutates and reorders the list.
+    """
+    return _build_sample_file_infos()
+
+
+def _build_sample_file_infos() -> list[FileInfo]:
+    """Build the FileInfo objects shared by graph and encoder fixtures."""
     main_path = Path("main.py")
     models_path = Path("models.py")
     utils_path = Path("utils.py")
@@ -163,13 +171,17 @@ def sample_file_infos() -> list[FileInfo]:
     ]
 
 
-@pytest.fixture()
-def sample_repo_map(sample_file_infos: list[FileInfo]) -> RepoMap:
-    """Pre-built RepoMap for encoder tests."""
+@pytest.fixture(scope="module")
+def sample_repo_map() -> RepoMap:
+    """Pre-built RepoMap for encoder tests.
+
+    Module-scoped since encoding only reads it; it gets its own FileInfo
+    list so graph tests mutating sample_file_infos cannot affect it.
+    """
     return RepoMap(
         repo_name="myproject",
         root=Path("/tmp/myproject"),
-        files=sample_file_infos,
+        files=_build_sample_file_infos(),
         dependencies=[
             Dependency(
                 source=Path("main.py"),
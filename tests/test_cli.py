@@ -3,9 +3,15 @@
 from __future__ import annotations
 
 import os
+import stat
+import subprocess
 import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from unittest.mock import patch
+from typing import TextIO
+from unittest.mock import MagicMock, patch
 
 from typer.testing import CliRunner
 
@@ -14,6 +20,22 @@ from sourcecrumb.cli import app
 runner = CliRunner()
 
 
+@contextmanager
+def _force_pool() -> Iterator[MagicMock]:
+    """Make --fast use a two-worker thread pool even for tiny inputs.
+
+    Yields a spy on the pool's constructor.
+    """
+    with (
+        patch("sourcecrumb.parallel._POOL_MIN_FILES", 1),
+        patch("sourcecrumb.parallel.os.process_cpu_count", return_value=2),
+        patch(
+            "sourcecrumb.parallel.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+        ) as pool,
+    ):
+        yield pool
+
+
 class TestCLI:
     """Tests for the sourcecrumb CLI."""
 
@@ -85,6 +107,28 @@ class TestCLI:
         assert result.exit_code == 1
         assert isinstance(result.exception, TypeError)
 
+    def test_map_fast(self, sample_repo: Path) -> None:
+        sequential = runner.invoke(app, [str(sample_repo)])
+        with _force_pool() as pool:
+            result = runner.invoke(app, [str(sample_repo), "--fast"])
+        pool.assert_called_once()
+        assert result.exit_code == 0
+        assert result.stdout == sequential.stdout
+
+
+class TestTrackedOnly:
+    """Tests for the --tracked-only flag."""
+
+    def test_omits_untracked_files(self, tmp_path: Path) -> None:
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        (tmp_path / "tracked.py").write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / "untracked.py").write_text("y = 2\n", encoding="utf-8")
+        subprocess.run(["git", "add", "tracked.py"], cwd=tmp_path, check=True)
+        result = runner.invoke(app, [str(tmp_path), "--tracked-only"])
+        assert result.exit_code == 0
+        assert "tracked.py" in result.stdout
+        assert "untracked.py" not in result.stdout
+
 
 class TestCache:
     """Tests for the --cache flag."""
@@ -134,6 +178,93 @@ class TestCache:
         assert result.exit_code == 0
         assert cache_file.stat().st_mtime > first_mtime
 
+    def test_failed_write_keeps_old_cache(
+        self, sample_repo: Path, tmp_path: Path
+    ) -> None:
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        cache_file = cache_dir / "map.cache"
+        cache_file.write_text("old map\n", encoding="utf-8")
+        os.utime(cache_file, ns=(0, 0))  # Older than every source: stale.
+
+        def partial_dump(_repo_map: object, out: TextIO) -> None:
+            out.write("repo: partial\nsymbols[")
+            raise RuntimeError("interrupted")
+
+        with patch("sourcecrumb.cli.dump", side_effect=partial_dump):
+            result = runner.invoke(app, [str(sample_repo), "--cache", str(cache_file)])
+        assert result.exit_code != 0
+        assert cache_file.read_text("utf-8") == "old map\n"
+        assert list(cache_dir.iterdir()) == [cache_file]
+
+    def test_new_cache_uses_umask_mode(self, sample_repo: Path, tmp_path: Path) -> None:
+        cache_file = tmp_path / "map.cache"
+        old_umask = os.umask(0o022)
+        try:
+            result = runner.invoke(app, [str(sample_repo), "--cache", str(cache_file)])
+        finally:
+            os.umask(old_umask)
+        assert result.exit_code == 0
+        assert stat.S_IMODE(cache_file.stat().st_mode) == 0o644
+
+    def test_rewrite_keeps_cache_mode(self, sample_repo: Path, tmp_path: Path) -> None:
+        cache_file = tmp_path / "map.cache"
+        cache_file.write_text("old map\n", encoding="utf-8")
+        cache_file.chmod(0o640)
+        os.utime(cache_file, ns=(0, 0))  # Older than every source: stale.
+        result = runner.invoke(app, [str(sample_repo), "--cache", str(cache_file)])
+        assert result.exit_code == 0
+        assert cache_file.read_text("utf-8") != "old map\n"
+        assert stat.S_IMODE(cache_file.stat().st_mode) == 0o640
+
+    def test_writes_through_symlinked_cache(
+        self, sample_repo: Path, tmp_path: Path
+    ) -> None:
+        target = tmp_path / "real.cache"
+        link = tmp_path / "map.cache"
+        link.symlink_to(target)
+        result = runner.invoke(app, [str(sample_repo), "--cache", str(link)])
+        assert result.exit_code == 0
+        assert link.is_symlink()
+        assert target.read_text("utf-8") == result.stdout
+
+
+class TestTagCache:
+    """Tests for the --tag-cache flag."""
+
+    def test_reuses_tags_for_unchanged_files(
+        self, sample_repo: Path, tmp_path: Path
+    ) -> None:
+        db = tmp_path / "tags.db"
+        first = runner.invoke(app, [str(sample_repo), "--tag-cache", str(db)])
+        assert first.exit_code == 0
+        with patch("sourcecrumb.cli.extract_tags", side_effect=AssertionError):
+            second = runner.invoke(app, [str(sample_repo), "--tag-cache", str(db)])
+        assert second.exit_code == 0
+        assert second.stdout == first.stdout
+
+    def test_reuses_tags_after_touch(self, sample_repo: Path, tmp_path: Path) -> None:
+        db = tmp_path / "tags.db"
+        first = runner.invoke(app, [str(sample_repo), "--tag-cache", str(db)])
+        for path in sample_repo.glob("*.py"):
+            st = path.stat()
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        with patch("sourcecrumb.cli.extract_tags", side_effect=AssertionError):
+            second = runner.invoke(app, [str(sample_repo), "--tag-cache", str(db)])
+        assert second.exit_code == 0
+        assert second.stdout == first.stdout
+
+    def test_reparses_edited_files(self, sample_repo: Path, tmp_path: Path) -> None:
+        db = tmp_path / "tags.db"
+        runner.invoke(app, [str(sample_repo), "--tag-cache", str(db)])
+        (sample_repo / "utils.py").write_text(
+            "def renamed_helper() -> None:\n    pass\n", encoding="utf-8"
+        )
+        result = runner.invoke(app, [str(sample_repo), "--tag-cache", str(db)])
+        assert result.exit_code == 0
+        assert "renamed_helper" in result.stdout
+        assert "format_name(name: str)" not in result.stdout
+
 
 class TestMaxFileSize:
     """Tests for the --max-file-size option."""
@@ -150,6 +281,23 @@ class TestMaxFileSize:
         assert "large.py" not in result.stdout
         assert "skipped" in result.output
 
+    def test_skips_large_files_parallel(self, tmp_path: Path) -> None:
+        (tmp_path / "small.py").write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / "small2.py").write_text("z = 3\n", encoding="utf-8")
+        (tmp_path / "large.py").write_text("y = 2\n" * 1000, encoding="utf-8")
+        small_size = (tmp_path / "small.py").stat().st_size
+        large_size = (tmp_path / "large.py").stat().st_size
+        limit = (small_size + large_size) // 2
+        with _force_pool() as pool:
+            result = runner.invoke(
+                app, [str(tmp_path), "--max-file-size", str(limit), "--fast"]
+            )
+        pool.assert_called_once()
+        assert result.exit_code == 0
+        assert "small.py" in result.stdout
+        assert "large.py" not in result.stdout
+        assert "skipped" in result.output
+
     def test_small_files_pass_with_limit(self, sample_repo: Path) -> None:
         result = runner.invoke(app, [str(sample_repo), "--max-file-size", "1000000"])
         assert result.exit_code == 0
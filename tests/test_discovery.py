@@ -2,11 +2,22 @@
 
 from __future__ import annotations
 
+import os
+import re
 import subprocess
+from collections.abc import Iterator
 from pathlib import Path
 from unittest.mock import patch
 
-from sourcecrumb.discovery import _git_ls_files, discover_files
+import pathspec
+
+from sourcecrumb.discovery import (
+    _anonymous,
+    _compile_matcher,
+    _git_listing,
+    _git_ls_files,
+    discover_files,
+)
 
 
 class TestDiscoverFiles:
@@ -37,6 +48,14 @@ class TestDiscoverFiles:
         result = discover_files(tmp_path)
         assert len(result) == 0
 
+    def test_skips_egg_info_dirs(self, tmp_path: Path) -> None:
+        egg = tmp_path / "mypkg.egg-info"
+        egg.mkdir()
+        (egg / "stub.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "main.py").write_text("pass", encoding="utf-8")
+        paths = [r[0] for r in discover_files(tmp_path)]
+        assert paths == [Path("main.py")]
+
     def test_respects_gitignore(self, tmp_path: Path) -> None:
         (tmp_path / ".gitignore").write_text("ignored.py\n", encoding="utf-8")
         (tmp_path / "ignored.py").write_text("pass", encoding="utf-8")
@@ -46,6 +65,28 @@ class TestDiscoverFiles:
         assert Path("ignored.py") not in paths
         assert Path("kept.py") in paths
 
+    def test_prunes_gitignored_directories(self, tmp_path: Path) -> None:
+        # Like git, files under an excluded directory cannot be re-included.
+        (tmp_path / ".gitignore").write_text(
+            "generated/\n!generated/keep.py\n", encoding="utf-8"
+        )
+        gen = tmp_path / "generated"
+        gen.mkdir()
+        (gen / "keep.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "kept.py").write_text("pass", encoding="utf-8")
+        result = discover_files(tmp_path)
+        paths = [r[0] for r in result]
+        assert paths == [Path("kept.py")]
+
+    def test_extra_ignores_prune_directories(self, tmp_path: Path) -> None:
+        gen = tmp_path / "gen"
+        gen.mkdir()
+        (gen / "out.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "app.py").write_text("pass", encoding="utf-8")
+        result = discover_files(tmp_path, extra_ignores=["gen/"])
+        paths = [r[0] for r in result]
+        assert paths == [Path("app.py")]
+
     def test_returns_relative_paths(self, tmp_path: Path) -> None:
         (tmp_path / "app.py").write_text("pass", encoding="utf-8")
         result = discover_files(tmp_path)
@@ -63,6 +104,12 @@ class TestDiscoverFiles:
         result = discover_files(tmp_path)
         assert len(result) == 0
 
+    def test_skips_files_without_extension(self, tmp_path: Path) -> None:
+        (tmp_path / "Makefile").write_text("all:", encoding="utf-8")
+        (tmp_path / "py").write_text("pass", encoding="utf-8")
+        result = discover_files(tmp_path)
+        assert len(result) == 0
+
     def test_extra_ignores(self, tmp_path: Path) -> None:
         (tmp_path / "gen.py").write_text("pass", encoding="utf-8")
         (tmp_path / "app.py").write_text("pass", encoding="utf-8")
@@ -94,6 +141,12 @@ class TestDiscoverFiles:
         assert Path("real.py") in paths
         assert Path("link.py") not in paths
 
+    def test_skips_fifos(self, tmp_path: Path) -> None:
+        (tmp_path / "real.py").write_text("pass", encoding="utf-8")
+        os.mkfifo(tmp_path / "pipe.py")
+        paths = [r[0] for r in discover_files(tmp_path)]
+        assert paths == [Path("real.py")]
+
     def test_nested_directories(self, tmp_path: Path) -> None:
         sub = tmp_path / "pkg"
         sub.mkdir()
@@ -101,6 +154,108 @@ class TestDiscoverFiles:
         result = discover_files(tmp_path)
         assert result[0][0] == Path("pkg/mod.py")
 
+    def test_multiple_top_level_subtrees(self, tmp_path: Path) -> None:
+        for rel in ("b/x/deep.py", "a/mod.py", "c/y/z/leaf.py", "root.py"):
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("pass", encoding="utf-8")
+        result = discover_files(tmp_path)
+        assert [r[0] for r in result] == [
+            Path("a/mod.py"),
+            Path("b/x/deep.py"),
+            Path("c/y/z/leaf.py"),
+            Path("root.py"),
+        ]
+
+    def test_order_matches_path_sort(self, tmp_path: Path) -> None:
+        rels = ["a.py", "a/b.py", "a-b/c.py", "a0.py", "a/z/d.py", "a/c.py", "B.py"]
+        for rel in rels:
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("pass", encoding="utf-8")
+        paths = [r[0] for r in discover_files(tmp_path)]
+        assert paths == sorted(Path(rel) for rel in rels)
+
+    def test_skips_symlinked_directories(self, tmp_path: Path) -> None:
+        real = tmp_path / "real"
+        real.mkdir()
+        (real / "mod.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "link").symlink_to(real, target_is_directory=True)
+        result = discover_files(tmp_path)
+        paths = [r[0] for r in result]
+        assert paths == [Path("real/mod.py")]
+
+    def test_records_size_and_mtime(self, tmp_path: Path) -> None:
+        f = tmp_path / "app.py"
+        f.write_text("pass", encoding="utf-8")
+        result = discover_files(tmp_path)
+        st = f.stat()
+        assert result[0].size == st.st_size
+        assert result[0].mtime_ns == st.st_mtime_ns
+
+    def test_skips_directory_that_fails_mid_listing(self, tmp_path: Path) -> None:
+        (tmp_path / "ok").mkdir()
+        (tmp_path / "ok" / "a.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "gone").mkdir()
+        (tmp_path / "gone" / "b.py").write_text("pass", encoding="utf-8")
+        real_scandir = os.scandir
+
+        def scandir(path: str) -> Iterator[os.DirEntry[str]]:
+            if not isinstance(path, str) or os.path.basename(path) != "gone":
+                return real_scandir(path)
+            os.remove(os.path.join(path, "b.py"))
+            os.rmdir(path)
+            return _FailingListing()
+
+        with patch("sourcecrumb.discovery.os.scandir", side_effect=scandir):
+            paths = [r[0] for r in discover_files(tmp_path)]
+        assert paths == [Path("ok/a.py")]
+
+    def test_skips_entry_whose_type_check_fails(self, tmp_path: Path) -> None:
+        (tmp_path / "keep.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "vanished.py").write_text("pass", encoding="utf-8")
+        real_scandir = os.scandir
+
+        def scandir(path: str) -> Iterator[os.DirEntry[str]]:
+            with real_scandir(path) as it:
+                entries = [
+                    _VanishedEntry(e) if e.name == "vanished.py" else e for e in it
+                ]
+            return _Listing(entries)
+
+        with patch("sourcecrumb.discovery.os.scandir", side_effect=scandir):
+            paths = [r[0] for r in discover_files(tmp_path)]
+        assert paths == [Path("keep.py")]
+
+
+class _Listing(list[os.DirEntry[str]]):
+    """A canned scandir listing usable as a context manager."""
+
+    def __enter__(self) -> _Listing:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+
+class _FailingListing(_Listing):
+    """A scandir listing whose directory disappears while it is read."""
+
+    def __iter__(self) -> Iterator[os.DirEntry[str]]:
+        raise FileNotFoundError("directory removed mid-walk")
+
+
+class _VanishedEntry:
+    """A DirEntry whose lstat fails, as when it is deleted mid-walk."""
+
+    def __init__(self, entry: os.DirEntry[str]) -> None:
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        raise FileNotFoundError(self.path)
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        raise FileNotFoundError(self.path)
+
 
 class TestGitLsFiles:
     """Tests for _git_ls_files."""
@@ -113,7 +268,7 @@ class TestGitLsFiles:
         with patch(
             "sourcecrumb.discovery.subprocess.run",
             return_value=subprocess.CompletedProcess(
-                [], returncode=128, stdout="", stderr=""
+                [], returncode=128, stdout=b"", stderr=b""
             ),
         ):
             assert _git_ls_files(tmp_path) is None
@@ -139,12 +294,103 @@ class TestGitLsFiles:
         with patch(
             "sourcecrumb.discovery.subprocess.run",
             return_value=subprocess.CompletedProcess(
-                [], returncode=0, stdout="a.py\npkg/b.py\n", stderr=""
+                [], returncode=0, stdout=b"a.py\0pkg/b.py\0", stderr=b""
             ),
         ):
             result = _git_ls_files(tmp_path)
             assert result == {"a.py", "pkg/b.py"}
 
+    def test_tracked_only_skips_others(self, tmp_path: Path) -> None:
+        (tmp_path / ".git").mkdir()
+        with patch(
+            "sourcecrumb.discovery.subprocess.run",
+            return_value=subprocess.CompletedProcess(
+                [], returncode=0, stdout=b"a.py\0", stderr=b""
+            ),
+        ) as run:
+            assert _git_ls_files(tmp_path, include_untracked=False) == {"a.py"}
+        cmd = run.call_args.args[0]
+        assert "--cached" in cmd
+        assert "--others" not in cmd
+
+    def test_tracked_only_cached_until_index_changes(self, tmp_path: Path) -> None:
+        (tmp_path / ".git").mkdir()
+        index = tmp_path / ".git" / "index"
+        index.write_bytes(b"v1")
+        with patch(
+            "sourcecrumb.discovery.subprocess.run",
+            return_value=subprocess.CompletedProcess(
+                [], returncode=0, stdout=b"a.py\0", stderr=b""
+            ),
+        ) as run:
+            first = _git_ls_files(tmp_path, include_untracked=False)
+            second = _git_ls_files(tmp_path, include_untracked=False)
+            assert run.call_count == 1
+            index.write_bytes(b"v22")
+            _git_ls_files(tmp_path, include_untracked=False)
+            assert run.call_count == 2
+        assert first == second == {"a.py"}
+
+    def test_untracked_listing_not_cached(self, tmp_path: Path) -> None:
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "index").write_bytes(b"v1")
+        with patch(
+            "sourcecrumb.discovery.subprocess.run",
+            return_value=subprocess.CompletedProcess(
+                [], returncode=0, stdout=b"a.py\0", stderr=b""
+            ),
+        ) as run:
+            _git_ls_files(tmp_path)
+            _git_ls_files(tmp_path)
+        assert run.call_count == 2
+
+    def test_handles_newline_in_name(self, tmp_path: Path) -> None:
+        (tmp_path / ".git").mkdir()
+        with patch(
+            "sourcecrumb.discovery.subprocess.run",
+            return_value=subprocess.CompletedProcess(
+                [], returncode=0, stdout=b"odd\nname.py\0b.py\0", stderr=b""
+            ),
+        ):
+            assert _git_ls_files(tmp_path) == {"odd\nname.py", "b.py"}
+
+    def test_undecodable_name_matches_scandir(self, tmp_path: Path) -> None:
+        (tmp_path / ".git").mkdir()
+        with patch(
+            "sourcecrumb.discovery.subprocess.run",
+            return_value=subprocess.CompletedProcess(
+                [], returncode=0, stdout=b"caf\xe9.py\0b.py\0", stderr=b""
+            ),
+        ):
+            assert _git_ls_files(tmp_path) == {os.fsdecode(b"caf\xe9.py"), "b.py"}
+
+    def test_empty_repo(self, tmp_path: Path) -> None:
+        (tmp_path / ".git").mkdir()
+        with patch(
+            "sourcecrumb.discovery.subprocess.run",
+            return_value=subprocess.CompletedProcess(
+                [], returncode=0, stdout=b"", stderr=b""
+            ),
+        ):
+            assert _git_ls_files(tmp_path) == frozenset()
+
+
+class TestGitListing:
+    """Tests for _git_listing."""
+
+    def test_collects_every_ancestor_dir(self, tmp_path: Path) -> None:
+        with patch(
+            "sourcecrumb.discovery._git_ls_files",
+            return_value=frozenset({"top.py", "a/b/c.py", "a/d.py", "e/f.py"}),
+        ):
+            listing = _git_listing(tmp_path, include_untracked=True)
+        assert listing is not None
+        assert listing[1] == {"a", "a/b", "e"}
+
+    def test_none_without_git(self, tmp_path: Path) -> None:
+        with patch("sourcecrumb.discovery._git_ls_files", return_value=None):
+            assert _git_listing(tmp_path, include_untracked=True) is None
+
 
 class TestGitIgnoreIntegration:
     """Tests for gitignore integration via git ls-files."""
@@ -178,6 +424,76 @@ class TestGitIgnoreIntegration:
         assert Path("ignored.py") not in paths
         assert Path("kept.py") in paths
 
+    def test_fallback_picks_up_gitignore_edits(self, tmp_path: Path) -> None:
+        """The cached .gitignore spec is rebuilt after the file changes."""
+        gitignore = tmp_path / ".gitignore"
+        gitignore.write_text("a.py\n", encoding="utf-8")
+        (tmp_path / "a.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "bb.py").write_text("pass", encoding="utf-8")
+        first = [r[0] for r in discover_files(tmp_path)]
+        gitignore.write_text("bb.py\n", encoding="utf-8")
+        second = [r[0] for r in discover_files(tmp_path)]
+        assert first == [Path("bb.py")]
+        assert second == [Path("a.py")]
+
+    def test_fallback_honors_nested_gitignores(self, tmp_path: Path) -> None:
+        """Without git, each directory's .gitignore applies beneath it."""
+        files = [
+            "secret_ok.py",
+            "sub/secret_ok.py",
+            "sub/secret_no.py",
+            "sub/local.py",
+            "sub/deeper/local.py",
+            "other/local.py",
+        ]
+        for rel in files:
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("pass", encoding="utf-8")
+        (tmp_path / ".gitignore").write_text("secret_*.py\n", encoding="utf-8")
+        (tmp_path / "sub" / ".gitignore").write_text(
+            "!secret_ok.py\n/local.py\n", encoding="utf-8"
+        )
+        paths = [r[0] for r in discover_files(tmp_path)]
+        assert paths == [
+            Path("other/local.py"),
+            Path("sub/deeper/local.py"),
+            Path("sub/secret_ok.py"),
+        ]
+
+    def test_fallback_tolerates_non_utf8_nested_gitignore(self, tmp_path: Path) -> None:
+        """A Latin-1 .gitignore neither aborts discovery nor loses its rules."""
+        sub = tmp_path / "sub"
+        sub.mkdir()
+        (sub / "keep.py").write_text("pass", encoding="utf-8")
+        (sub / "drop.py").write_text("pass", encoding="utf-8")
+        (sub / ".gitignore").write_bytes(b"# caf\xe9\ndrop.py\n")
+        paths = [r[0] for r in discover_files(tmp_path)]
+        assert paths == [Path("sub/keep.py")]
+
+    def test_fallback_when_git_command_fails(self, tmp_path: Path) -> None:
+        """A git checkout still honors .gitignore if git ls-files fails."""
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".gitignore").write_text("gen/\n", encoding="utf-8")
+        (tmp_path / "gen").mkdir()
+        (tmp_path / "gen" / "out.py").write_text("pass", encoding="utf-8")
+        (tmp_path / "kept.py").write_text("pass", encoding="utf-8")
+        with patch("sourcecrumb.discovery._git_ls_files", return_value=None):
+            result = discover_files(tmp_path)
+        assert [r[0] for r in result] == [Path("kept.py")]
+
+    def test_tracked_file_in_ignored_dir_kept(self, tmp_path: Path) -> None:
+        """In a git checkout, files git lists are kept despite .gitignore."""
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".gitignore").write_text("vendor/\n", encoding="utf-8")
+        (tmp_path / "vendor").mkdir()
+        (tmp_path / "vendor" / "lib.py").write_text("pass", encoding="utf-8")
+        with patch(
+            "sourcecrumb.discovery._git_ls_files",
+            return_value={"vendor/lib.py"},
+        ):
+            result = discover_files(tmp_path)
+        assert [r[0] for r in result] == [Path("vendor/lib.py")]
+
     def test_extra_ignores_with_git_ls_files(self, tmp_path: Path) -> None:
         """extra_ignores still applies when git ls-files is used."""
         (tmp_path / "gen.py").write_text("pass", encoding="utf-8")
@@ -190,3 +506,54 @@ class TestGitIgnoreIntegration:
         paths = [r[0] for r in result]
         assert Path("gen.py") not in paths
         assert Path("app.py") in paths
+
+    def test_unlisted_dirs_dropped(self, tmp_path: Path) -> None:
+        """Directories git lists nothing under contribute no files."""
+        (tmp_path / ".git").mkdir()
+        for d in ("src", "junk"):
+            (tmp_path / d).mkdir()
+            (tmp_path / d / "a.py").write_text("pass", encoding="utf-8")
+        with patch(
+            "sourcecrumb.discovery._git_ls_files",
+            return_value=frozenset({"src/a.py"}),
+        ):
+            result = discover_files(tmp_path)
+        assert [r[0] for r in result] == [Path("src/a.py")]
+
+
+class TestCompileMatcher:
+    """Tests for _compile_matcher."""
+
+    def test_empty_returns_none(self) -> None:
+        assert _compile_matcher(["", "# comment"]) is None
+
+    def test_matches_pathspec(self) -> None:
+        lines = ["*.log", "build/", "doc/*.md"]
+        matcher = _compile_matcher(lines)
+        spec = pathspec.PathSpec.from_lines("gitignore", lines)
+        assert matcher is not None
+        paths = ["x.log", "a/b.log", "build/", "src/build/", "doc/a.md", "doc/x/a.md"]
+        assert [bool(matcher(p)) for p in paths] == [spec.match_file(p) for p in paths]
+
+    def test_negation_respected(self) -> None:
+        matcher = _compile_matcher(["*.log", "!keep.log"])
+        assert matcher is not None
+        assert matcher("drop.log")
+        assert not matcher("keep.log")
+
+    def test_last_matching_run_wins(self) -> None:
+        lines = ["gen/", "*.log", "!gen/keep.py", "!*.keep.log", "bad.keep.log"]
+        matcher = _compile_matcher(lines)
+        spec = pathspec.PathSpec.from_lines("gitignore", lines)
+        paths = ["gen/x.py", "gen/keep.py", "a.log", "a.keep.log", "bad.keep.log"]
+        assert matcher is not None
+        assert [bool(matcher(p)) for p in paths] == [spec.match_file(p) for p in paths]
+        assert [matcher(p) for p in paths] == [True, False, True, False, True]
+
+    def test_named_groups_share_one_alternation(self) -> None:
+        """Directory patterns from pathspec 0.12 name a group; both still fold."""
+        pattern = r"^(?:.+/)?build(?P<ps_d>/).*$"
+        combined = re.compile(f"{_anonymous(pattern)}|{_anonymous(pattern)}")
+        assert combined.match("src/build/x.py")
+        assert not combined.groupindex
+        assert _anonymous(re.escape("(?P<x>)")) == re.escape("(?P<x>)")
@@ -4,10 +4,40 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from sourcecrumb.graph import build_graph, rank_files
+from sourcecrumb.graph import FileGraph, build_graph, rank_files
 from sourcecrumb.models import FileInfo, SymbolKind, Tag, TagKind
 
 
+def _file(name: str, *, defs: list[str], refs: list[str]) -> FileInfo:
+    """Build a FileInfo defining and referencing the given function names."""
+    path = Path(name)
+    tags = [
+        Tag(
+            name=sym,
+            kind=kind,
+            symbol_kind=SymbolKind.FUNCTION,
+            line=line,
+            file=path,
+        )
+        for line, (kind, sym) in enumerate(
+            [(TagKind.DEFINITION, d) for d in defs]
+            + [(TagKind.REFERENCE, r) for r in refs],
+            start=1,
+        )
+    ]
+    return FileInfo(path=path, language="python", tags=tags)
+
+
+def _edge_weight(graph: FileGraph, source: Path, target: Path) -> int:
+    """Read an edge's weight from the graph's CSR arrays, or 0 if absent."""
+    i, j = graph.path_to_id[source], graph.path_to_id[target]
+    start, end = graph.indptr[i], graph.indptr[i + 1]
+    for k in range(start, end):
+        if graph.indices[k] == j:
+            return int(graph.weights[k])
+    return 0
+
+
 class TestBuildGraph:
     """Tests for build_graph."""
 
@@ -61,6 +91,16 @@ class TestBuildGraph:
         assert len(main_to_models) == 1
         assert "User" in main_to_models[0].symbols
 
+    def test_edge_weight_counts_references(self) -> None:
+        infos = [
+            _file("a.py", defs=[], refs=["x", "x", "x", "y"]),
+            _file("b.py", defs=["x", "y"], refs=[]),
+        ]
+        graph, deps = build_graph(infos)
+        assert _edge_weight(graph, Path("a.py"), Path("b.py")) == 4
+        assert _edge_weight(graph, Path("b.py"), Path("a.py")) == 0
+        assert deps[0].symbols == ["x", "y"]
+
     def test_multiple_targets(self, sample_file_infos: list[FileInfo]) -> None:
         _, deps = build_graph(sample_file_infos)
         main_deps = [d for d in deps if d.source == Path("main.py")]
@@ -68,6 +108,15 @@ class TestBuildGraph:
         assert Path("models.py") in targets
         assert Path("utils.py") in targets
 
+    def test_graph_compares_by_identity(
+        self, sample_file_infos: list[FileInfo]
+    ) -> None:
+        graph, _ = build_graph(sample_file_infos)
+        other, _ = build_graph(sample_file_infos)
+        assert graph == graph
+        assert graph != other
+        assert hash(graph) != hash(other)
+
 
 class TestRankFiles:
     """Tests for rank_files."""
@@ -96,6 +145,18 @@ class TestRankFiles:
         rank_by_path = {fi.path: fi.rank for fi in sample_file_infos}
         assert rank_by_path[Path("models.py")] > rank_by_path[Path("main.py")]
 
+    def test_repeated_references_outweigh_distinct_symbols(self) -> None:
+        """Edges are weighted by reference count, not distinct symbols."""
+        infos = [
+            _file("user.py", defs=[], refs=["hot", "hot", "hot", "c1", "c2"]),
+            _file("hot.py", defs=["hot"], refs=[]),
+            _file("cold.py", defs=["c1", "c2"], refs=[]),
+        ]
+        graph, _ = build_graph(infos)
+        rank_files(graph, infos)
+        rank_by_path = {fi.path: fi.rank for fi in infos}
+        assert rank_by_path[Path("hot.py")] > rank_by_path[Path("cold.py")]
+
     def test_empty_graph_uniform_rank(self) -> None:
         fi1 = FileInfo(path=Path("a.py"), language="python")
         fi2 = FileInfo(path=Path("b.py"), language="python")
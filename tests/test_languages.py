@@ -2,9 +2,19 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
 from tree_sitter import Query
 
-from sourcecrumb.languages import LANGUAGES, language_for_extension
+from sourcecrumb.languages import (
+    _TAG_QUERIES,
+    LANGUAGES,
+    _cached_tag_query,
+    _load_query_file,
+    extension_map,
+    language_for_extension,
+)
 
 
 class TestLanguageForExtension:
@@ -22,6 +32,19 @@ class TestLanguageForExtension:
         assert language_for_extension("py") is None
 
 
+class TestExtensionMap:
+    """Tests for extension_map."""
+
+    def test_all_languages(self) -> None:
+        assert extension_map()[".py"] is LANGUAGES["python"]
+
+    def test_filtered_to_language(self) -> None:
+        assert dict(extension_map("python")) == {".py": LANGUAGES["python"]}
+
+    def test_unknown_language_is_empty(self) -> None:
+        assert not extension_map("cobol")
+
+
 class TestTreeSitterLanguage:
     """Tests for TreeSitterLanguage configuration."""
 
@@ -44,6 +67,29 @@ class TestTreeSitterLanguage:
         lang = LANGUAGES["python"]
         assert lang.get_parser() is lang.get_parser()
 
+    def test_get_parser_is_per_thread(self) -> None:
+        lang = LANGUAGES["python"]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(lang.get_parser).result()
+        assert other is not lang.get_parser()
+
     def test_get_tag_query_returns_same_instance(self) -> None:
         lang = LANGUAGES["python"]
         assert lang.get_tag_query() is lang.get_tag_query()
+
+    def test_tag_query_compiled_once_across_threads(self) -> None:
+        with (
+            patch.dict("sourcecrumb.languages._TAG_QUERIES", clear=True),
+            patch(
+                "sourcecrumb.languages._load_query_file",
+                wraps=_load_query_file,
+            ) as load,
+            ThreadPoolExecutor(max_workers=4) as executor,
+        ):
+            queries = list(executor.map(_cached_tag_query, ["python"] * 8))
+        assert load.call_count == 1
+        assert all(q is queries[0] for q in queries)
+
+    def test_tag_query_cached_by_name(self) -> None:
+        query = LANGUAGES["python"].get_tag_query()
+        assert _TAG_QUERIES["python"] is query
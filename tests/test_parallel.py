@@ -0,0 +1,227 @@
+"""Tests for parallel tag extraction."""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sourcecrumb.discovery import DiscoveredFile
+from sourcecrumb.parallel import (
+    _POOL_MIN_FILES,
+    _bounded_map,
+    _init_worker,
+    _parse_file_worker,
+    _parse_in_worker,
+    iter_parse_files_parallel,
+    parse_files_parallel,
+)
+from sourcecrumb.parsing import extract_tags
+
+
+def _file(name: str) -> DiscoveredFile:
+    """Build a discovered Python file with a nominal recorded size."""
+    return DiscoveredFile(Path(name), "python", size=100, mtime_ns=0)
+
+
+_FILES = [_file("main.py"), _file("models.py"), _file("utils.py")]
+
+
+class TestParseFileWorker:
+    """Tests for _parse_file_worker."""
+
+    def test_successful_parse(self, sample_repo: Path) -> None:
+        file_info, warning = _parse_file_worker(
+            sample_repo, _file("models.py"), max_size_bytes=1_000_000
+        )
+        assert warning is None
+        assert file_info is not None
+        assert file_info.path == Path("models.py")
+        assert any(t.name == "User" for t in file_info.tags)
+
+    def test_file_size_filtering(self, sample_repo: Path) -> None:
+        file_info, warning = _parse_file_worker(
+            sample_repo, _file("models.py"), max_size_bytes=1
+        )
+        assert file_info is None
+        assert warning is not None
+        assert "skipped" in warning
+
+    def test_missing_file_warns(self, tmp_path: Path) -> None:
+        file_info, warning = _parse_file_worker(
+            tmp_path, _file("gone.py"), max_size_bytes=1_000_000
+        )
+        assert file_info is None
+        assert warning is not None
+        assert "failed to parse" in warning
+
+    def test_empty_file_not_opened(self, tmp_path: Path) -> None:
+        item = DiscoveredFile(Path("__init__.py"), "python", size=0, mtime_ns=0)
+        with patch("sourcecrumb.parallel.extract_tags") as extract:
+            file_info, warning = _parse_file_worker(
+                tmp_path, item, max_size_bytes=1_000_000
+            )
+        extract.assert_not_called()
+        assert warning is None
+        assert file_info is not None
+        assert file_info.tags == []
+
+    def test_unicode_decode_error_warns(self, sample_repo: Path) -> None:
+        with patch(
+            "sourcecrumb.parallel.extract_tags",
+            side_effect=UnicodeDecodeError("utf-8", b"", 0, 1, "bad"),
+        ):
+            file_info, warning = _parse_file_worker(
+                sample_repo, _file("models.py"), max_size_bytes=1_000_000
+            )
+        assert file_info is None
+        assert warning is not None
+
+
+class TestParseFilesParallel:
+    """Tests for parse_files_parallel."""
+
+    def test_thread_pool_preserves_input_order(self, sample_repo: Path) -> None:
+        with patch(
+            "sourcecrumb.parallel.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+        ) as pool:
+            infos = parse_files_parallel(
+                sample_repo,
+                _FILES,
+                max_size_bytes=1_000_000,
+                max_workers=2,
+                use_threads=True,
+            )
+        pool.assert_called_once_with(max_workers=2)
+        assert [fi.path for fi in infos] == [f.path for f in _FILES]
+
+    def test_single_worker_fallback(self, sample_repo: Path) -> None:
+        infos = parse_files_parallel(
+            sample_repo, _FILES, max_size_bytes=1_000_000, max_workers=1
+        )
+        assert len(infos) == 3
+
+    def test_process_pool_preserves_input_order(self, sample_repo: Path) -> None:
+        with patch(
+            "sourcecrumb.parallel.ProcessPoolExecutor", wraps=ProcessPoolExecutor
+        ) as pool:
+            infos = parse_files_parallel(
+                sample_repo,
+                _FILES,
+                max_size_bytes=1_000_000,
+                max_workers=2,
+                use_threads=False,
+            )
+        pool.assert_called_once()
+        assert [fi.path for fi in infos] == [f.path for f in _FILES]
+
+    def test_worker_count_follows_usable_cpus(self, sample_repo: Path) -> None:
+        # Large enough to pass the small-input short-circuit, so only the
+        # CPU count keeps the work in-process.
+        files = _FILES * (_POOL_MIN_FILES // len(_FILES) + 1)
+        with (
+            patch("sourcecrumb.parallel.os.process_cpu_count", return_value=1),
+            patch(
+                "sourcecrumb.parallel.ThreadPoolExecutor", side_effect=AssertionError
+            ),
+            patch(
+                "sourcecrumb.parallel.ProcessPoolExecutor", side_effect=AssertionError
+            ),
+        ):
+            infos = parse_files_parallel(sample_repo, files, max_size_bytes=1_000_000)
+        assert len(infos) == len(files)
+
+    def test_large_input_uses_pool(self, sample_repo: Path) -> None:
+        files = _FILES * (_POOL_MIN_FILES // len(_FILES) + 1)
+        with (
+            patch("sourcecrumb.parallel.os.process_cpu_count", return_value=2),
+            patch(
+                "sourcecrumb.parallel.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+            ) as pool,
+        ):
+            infos = parse_files_parallel(sample_repo, files, max_size_bytes=1_000_000)
+        pool.assert_called_once_with(max_workers=2)
+        assert len(infos) == len(files)
+
+    def test_small_input_parsed_in_process(self, sample_repo: Path) -> None:
+        with patch(
+            "sourcecrumb.parallel.ThreadPoolExecutor", side_effect=AssertionError
+        ):
+            infos = parse_files_parallel(
+                sample_repo, _FILES, max_size_bytes=1_000_000, max_workers=2
+            )
+        assert len(infos) == 3
+
+    def test_skips_failed_files(self, sample_repo: Path) -> None:
+        files = [*_FILES, _file("missing.py")]
+        infos = parse_files_parallel(
+            sample_repo,
+            files,
+            max_size_bytes=1_000_000,
+            max_workers=2,
+            use_threads=True,
+        )
+        assert len(infos) == 3
+
+
+class TestIterParseFilesParallel:
+    """Tests for iter_parse_files_parallel."""
+
+    def test_yields_in_input_order(self, sample_repo: Path) -> None:
+        results = iter_parse_files_parallel(
+            sample_repo,
+            _FILES,
+            max_size_bytes=1_000_000,
+            max_workers=2,
+            use_threads=True,
+        )
+        assert [fi.path for fi in results] == [f.path for f in _FILES]
+
+    def test_first_result_before_rest_parsed(self, sample_repo: Path) -> None:
+        with patch("sourcecrumb.parallel.extract_tags", wraps=extract_tags) as extract:
+            results = iter_parse_files_parallel(
+                sample_repo, _FILES, max_size_bytes=1_000_000, max_workers=1
+            )
+            first = next(results)
+            assert extract.call_count == 1
+        assert first.path == _FILES[0].path
+
+
+class TestInitWorker:
+    """Tests for _init_worker."""
+
+    def test_warms_language_caches(self) -> None:
+        with (
+            patch("sourcecrumb.languages._cached_parser") as parser,
+            patch("sourcecrumb.languages._cached_tag_query") as query,
+        ):
+            _init_worker(Path(), 1_000_000, ("python",))
+        parser.assert_called_once_with("python")
+        query.assert_called_once_with("python")
+
+    def test_worker_uses_stored_settings(self, sample_repo: Path) -> None:
+        _init_worker(sample_repo, 1, ())
+        file_info, warning = _parse_in_worker(_file("models.py"))
+        assert file_info is None
+        assert warning is not None
+        assert "skipped" in warning
+
+
+class TestBoundedMap:
+    """Tests for _bounded_map."""
+
+    def test_preserves_order(self) -> None:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(_bounded_map(executor, lambda x: x * x, range(20), window=2))
+        assert results == [x * x for x in range(20)]
+
+    def test_limits_in_flight_tasks(self) -> None:
+        executor = MagicMock(spec=ThreadPoolExecutor)
+        executor.submit.side_effect = lambda fn, item: MagicMock(
+            result=lambda: fn(item)
+        )
+        results = _bounded_map(executor, str, range(10), window=3)
+        assert next(results) == "0"
+        assert executor.submit.call_count == 3
+        assert next(results) == "1"
+        assert executor.submit.call_count == 4
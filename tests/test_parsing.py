@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 
 from sourcecrumb.languages import LANGUAGES
@@ -47,6 +48,26 @@ class TestExtractTags:
         assert len(methods) == 1
         assert methods[0].name == "Foo.method"
 
+    def test_extracts_decorated_method(self, tmp_path: Path) -> None:
+        f = tmp_path / "mod.py"
+        f.write_text(
+            "class Foo:\n    @property\n    def value(self):\n        return 1\n",
+            encoding="utf-8",
+        )
+        tags = extract_tags(f, PYTHON)
+        methods = [t for t in tags if t.symbol_kind == SymbolKind.METHOD]
+        assert [m.name for m in methods] == ["Foo.value"]
+
+    def test_nested_function_is_not_method(self, tmp_path: Path) -> None:
+        f = tmp_path / "mod.py"
+        f.write_text(
+            "def outer():\n    def inner():\n        pass\n",
+            encoding="utf-8",
+        )
+        tags = extract_tags(f, PYTHON)
+        defs = [t for t in tags if t.kind == TagKind.DEFINITION]
+        assert {t.symbol_kind for t in defs} == {SymbolKind.FUNCTION}
+
     def test_extracts_call_reference(self, tmp_path: Path) -> None:
         f = tmp_path / "mod.py"
         f.write_text("foo()\n", encoding="utf-8")
@@ -77,6 +98,12 @@ class TestExtractTags:
         foo = [t for t in tags if t.name == "foo" and t.kind == TagKind.DEFINITION]
         assert foo[0].line == 2
 
+    def test_names_are_interned(self, tmp_path: Path) -> None:
+        f = tmp_path / "mod.py"
+        f.write_text("def shared_name():\n    pass\n", encoding="utf-8")
+        tags = extract_tags(f, PYTHON)
+        assert tags[0].name is sys.intern("shared_name")
+
     def test_empty_file(self, tmp_path: Path) -> None:
         f = tmp_path / "empty.py"
         f.write_text("", encoding="utf-8")
@@ -0,0 +1,157 @@
+"""Tests for the persistent per-file tag cache."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sourcecrumb.models import SymbolKind, Tag, TagKind
+from sourcecrumb.tagcache import TagCache, file_digest
+
+_REL = Path("pkg/mod.py")
+_DIGEST = b"digest"
+_TAGS = [
+    Tag(
+        name="foo",
+        kind=TagKind.DEFINITION,
+        symbol_kind=SymbolKind.FUNCTION,
+        line=1,
+        file=_REL,
+        signature="foo()",
+    ),
+]
+
+
+class TestTagCache:
+    """Tests for TagCache."""
+
+    def test_round_trip(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+            assert cache.get(_REL, 100, 10) == _TAGS
+
+    def test_miss_for_unknown_path(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            assert cache.get(_REL, 100, 10) is None
+
+    def test_miss_when_mtime_changes(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+            assert cache.get(_REL, 101, 10) is None
+
+    def test_miss_when_size_changes(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+            assert cache.get(_REL, 100, 11) is None
+
+    def test_digest_hit_after_mtime_change(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+            assert cache.get(_REL, 101, 10) is None
+            assert cache.get_by_digest(_REL, _DIGEST) == _TAGS
+
+    def test_digest_miss_when_contents_change(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+            assert cache.get_by_digest(_REL, b"other") is None
+            assert cache.get_by_digest(Path("other.py"), _DIGEST) is None
+
+    def test_persists_across_instances(self, tmp_path: Path) -> None:
+        db = tmp_path / "sub" / "tags.db"
+        with TagCache(db) as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+        with TagCache(db) as cache:
+            assert cache.get(_REL, 100, 10) == _TAGS
+
+    def test_put_replaces_stale_entry(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+            cache.put(_REL, 200, 20, _DIGEST, [])
+            assert cache.get(_REL, 100, 10) is None
+            assert cache.get(_REL, 200, 20) == []
+
+    def test_loaded_names_are_interned(self, tmp_path: Path) -> None:
+        with TagCache(tmp_path / "tags.db") as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+            tags = cache.get(_REL, 100, 10)
+        assert tags is not None
+        assert tags[0].name is sys.intern("foo")
+
+    def test_uses_write_ahead_log(self, tmp_path: Path) -> None:
+        db = tmp_path / "tags.db"
+        with TagCache(db):
+            pass
+        conn = sqlite3.connect(db)
+        (mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+        conn.close()
+        assert mode == "wal"
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path: Path) -> None:
+        db = tmp_path / "tags.db"
+        with TagCache(db) as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+        conn = sqlite3.connect(db)
+        conn.execute("UPDATE tags SET data = ?", (b"not a pickle",))
+        conn.commit()
+        conn.close()
+        with TagCache(db) as cache:
+            assert cache.get(_REL, 100, 10) is None
+
+    @pytest.mark.parametrize(
+        "state",
+        [
+            pytest.param(["foo", TagKind.DEFINITION], id="too-few-fields"),
+            pytest.param(
+                ["foo", TagKind.DEFINITION, SymbolKind.FUNCTION, 1, _REL, "", 0],
+                id="too-many-fields",
+            ),
+            pytest.param(
+                [1, TagKind.DEFINITION, SymbolKind.FUNCTION, 1, _REL, ""],
+                id="wrong-field-type",
+            ),
+            pytest.param(7, id="not-a-sequence"),
+        ],
+    )
+    def test_stale_tag_layout_is_a_miss(self, tmp_path: Path, state: object) -> None:
+        db = tmp_path / "tags.db"
+        with (
+            TagCache(db) as cache,
+            patch.object(Tag, "__getstate__", lambda _self: state),
+        ):
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+        with TagCache(db) as cache:
+            assert cache.get(_REL, 100, 10) is None
+            assert cache.get_by_digest(_REL, _DIGEST) is None
+
+    def test_schema_version_mismatch_drops_entries(self, tmp_path: Path) -> None:
+        db = tmp_path / "tags.db"
+        with TagCache(db) as cache:
+            cache.put(_REL, 100, 10, _DIGEST, _TAGS)
+        conn = sqlite3.connect(db)
+        conn.execute("PRAGMA user_version = 0")
+        conn.close()
+        with TagCache(db) as cache:
+            assert cache.get(_REL, 100, 10) is None
+
+
+class TestFileDigest:
+    """Tests for file_digest."""
+
+    def test_depends_only_on_contents(self, tmp_path: Path) -> None:
+        a = tmp_path / "a.py"
+        b = tmp_path / "b.py"
+        a.write_bytes(b"x = 1\n")
+        b.write_bytes(b"x = 1\n")
+        assert file_digest(a) == file_digest(b)
+        b.write_bytes(b"x = 2\n")
+        assert file_digest(a) != file_digest(b)
+
+    def test_empty_file(self, tmp_path: Path) -> None:
+        empty = tmp_path / "empty.py"
+        empty.write_bytes(b"")
+        assert file_digest(empty) == hashlib.blake2b().digest()
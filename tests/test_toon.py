@@ -2,116 +2,170 @@
 
 from __future__ import annotations
 
+import dataclasses
+import io
 from pathlib import Path
 
+import pytest
+
 from sourcecrumb.models import FileInfo, RepoMap, SymbolKind, Tag, TagKind
-from sourcecrumb.toon import _encode_value, encode
+from sourcecrumb.toon import _encode_value, dump, encode
+
+_MOD_PATH = Path("mod.py")
+_TMP_PATH = Path("/tmp/test")
+
+# Fragments the encoded sample_repo_map must contain.
+_EXPECTED_SUBSTRINGS = frozenset(
+    {
+        "repo: myproject",
+        "root: myproject",
+        "files[",
+        "symbols[",
+        "dependencies[",
+        "files[3]{path,language,rank}:",
+        "dependencies[2]{source,target,symbols}:",
+        "main.py",
+    }
+)
+
+
+@pytest.fixture(scope="module")
+def encoded_sample(sample_repo_map: RepoMap) -> str:
+    """The encoded sample map, computed once for the module's read-only tests."""
+    return encode(sample_repo_map)
+
+
+@pytest.fixture(scope="session")
+def special_char_repo_map() -> RepoMap:
+    """A one-file map whose signature needs quoting."""
+    return RepoMap(
+        repo_name="test",
+        root=_TMP_PATH,
+        files=[
+            FileInfo(
+                path=_MOD_PATH,
+                language="python",
+                tags=[
+                    Tag(
+                        name="foo",
+                        kind=TagKind.DEFINITION,
+                        symbol_kind=SymbolKind.FUNCTION,
+                        line=1,
+                        file=_MOD_PATH,
+                        signature="foo(x: int, y: str) -> dict[str, int]",
+                    ),
+                ],
+            ),
+        ],
+    )
+
+
+@pytest.fixture(scope="session")
+def special_char_encoded(special_char_repo_map: RepoMap) -> str:
+    """The encoded special_char_repo_map."""
+    return encode(special_char_repo_map)
 
 
 class TestEncodeValue:
     """Tests for _encode_value."""
 
-    def test_plain_string_unquoted(self) -> None:
-        assert _encode_value("hello") == "hello"
-
-    def test_string_with_comma_quoted(self) -> None:
-        assert _encode_value("a,b") == '"a,b"'
-
-    def test_string_with_colon_quoted(self) -> None:
-        assert _encode_value("a:b") == '"a:b"'
-
-    def test_number_unquoted(self) -> None:
-        assert _encode_value("42") == "42"
-        assert _encode_value("3.14") == "3.14"
-
-    def test_empty_string_quoted(self) -> None:
-        assert _encode_value("") == '""'
-
-    def test_boolean_keywords_quoted(self) -> None:
-        assert _encode_value("true") == '"true"'
-        assert _encode_value("false") == '"false"'
-        assert _encode_value("null") == '"null"'
-
-    def test_leading_whitespace_quoted(self) -> None:
-        assert _encode_value(" hello") == '" hello"'
-
-    def test_string_with_quotes_escaped(self) -> None:
-        assert _encode_value('say "hi"') == '"say \\"hi\\""'
-
-    def test_dash_prefix_quoted(self) -> None:
-        assert _encode_value("-flag") == '"-flag"'
-
-    def test_newline_quoted(self) -> None:
-        assert _encode_value("hello\nworld") == '"hello\\nworld"'
-
-    def test_carriage_return_quoted(self) -> None:
-        assert _encode_value("hello\rworld") == '"hello\\rworld"'
-
-    def test_tab_quoted(self) -> None:
-        assert _encode_value("hello\tworld") == '"hello\\tworld"'
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            pytest.param("hello", "hello", id="plain"),
+            pytest.param("a,b", '"a,b"', id="comma"),
+            pytest.param("a:b", '"a:b"', id="colon"),
+            pytest.param("42", "42", id="integer"),
+            pytest.param("3.14", "3.14", id="float"),
+            pytest.param("", '""', id="empty"),
+            pytest.param("true", '"true"', id="true"),
+            pytest.param("false", '"false"', id="false"),
+            pytest.param("null", '"null"', id="null"),
+            pytest.param("True", '"True"', id="mixed-case-keyword"),
+            pytest.param("pkg/sub-dir/mod.py", "pkg/sub-dir/mod.py", id="path"),
+            pytest.param(" hello", '" hello"', id="leading-whitespace"),
+            pytest.param('say "hi"', '"say \\"hi\\""', id="quotes"),
+            pytest.param("-flag", '"-flag"', id="dash-prefix"),
+            pytest.param("hello\nworld", '"hello\\nworld"', id="newline"),
+            pytest.param("hello\rworld", '"hello\\rworld"', id="carriage-return"),
+            pytest.param("hello\tworld", '"hello\\tworld"', id="tab"),
+        ],
+    )
+    def test_encodes(self, value: str, expected: str) -> None:
+        assert _encode_value(value) == expected
 
 
 class TestEncode:
     """Tests for encode."""
 
-    def test_produces_valid_toon(self, sample_repo_map: RepoMap) -> None:
-        result = encode(sample_repo_map)
+    def test_produces_valid_toon(self, encoded_sample: str) -> None:
+        result = encoded_sample
         assert result.startswith("repo: myproject")
-        assert "root: myproject" in result
-        assert "files[" in result
-        assert "symbols[" in result
-        assert "dependencies[" in result
-
-    def test_files_tabular_format(self, sample_repo_map: RepoMap) -> None:
-        result = encode(sample_repo_map)
-        assert "files[3]{path,language,rank}:" in result
-
-    def test_symbols_only_definitions(self, sample_repo_map: RepoMap) -> None:
-        result = encode(sample_repo_map)
-        lines = result.split("\n")
-        # Find the symbols section
-        sym_start = None
-        for i, line in enumerate(lines):
-            if line.startswith("symbols["):
-                sym_start = i
-                break
-        assert sym_start is not None
-        # Count symbols - should match definition count
-        header = lines[sym_start]
-        count = int(header.split("[")[1].split("]")[0])
+        # One forward sweep: each section must follow the previous one.
+        pos = 0
+        for needle in ("root: myproject", "files[", "symbols[", "dependencies["):
+            pos = result.find(needle, pos)
+            assert pos != -1, needle
+            pos += len(needle)
+
+    @pytest.mark.parametrize("needle", sorted(_EXPECTED_SUBSTRINGS))
+    def test_contains(self, encoded_sample: str, needle: str) -> None:
+        assert needle in encoded_sample
+
+    def test_symbols_only_definitions(self, encoded_sample: str) -> None:
+        result = encoded_sample
+        # The symbols header's row count should match the definition count
+        marker = "\nsymbols["
+        start = result.find(marker)
+        assert start != -1
+        count = int(result[start + len(marker) : result.find("]", start)])
         # We have 4 definitions in sample_file_infos: run, User, __init__, format_name
         assert count == 4
 
-    def test_dependencies_in_output(self, sample_repo_map: RepoMap) -> None:
-        result = encode(sample_repo_map)
-        assert "dependencies[2]{source,target,symbols}:" in result
-        assert "main.py" in result
-
-    def test_signatures_with_special_chars_quoted(self) -> None:
-        repo_map = RepoMap(
-            repo_name="test",
-            root=Path("/tmp/test"),
-            files=[
-                FileInfo(
-                    path=Path("mod.py"),
-                    language="python",
-                    tags=[
-                        Tag(
-                            name="foo",
-                            kind=TagKind.DEFINITION,
-                            symbol_kind=SymbolKind.FUNCTION,
-                            line=1,
-                            file=Path("mod.py"),
-                            signature="foo(x: int, y: str) -> dict[str, int]",
-                        ),
-                    ],
+    def test_signatures_with_special_chars_quoted(
+        self, special_char_encoded: str
+    ) -> None:
+        # The signature contains commas and colons, so it should be quoted
+        assert '"foo(x: int, y: str) -> dict[str, int]"' in special_char_encoded
+
+    def test_no_trailing_newline(self, encoded_sample: str) -> None:
+        assert encoded_sample
+        assert encoded_sample[-1] != "\n"
+
+    def test_symbols_follow_replaced_tags(self) -> None:
+        empty = FileInfo(path=_MOD_PATH, language="python")
+        fi = dataclasses.replace(
+            empty,
+            tags=[
+                Tag(
+                    name="late",
+                    kind=TagKind.DEFINITION,
+                    symbol_kind=SymbolKind.FUNCTION,
+                    line=3,
+                    file=_MOD_PATH,
                 ),
             ],
         )
-        result = encode(repo_map)
-        # The signature contains commas and colons, so it should be quoted
-        assert '"foo(x: int, y: str) -> dict[str, int]"' in result
-
-    def test_no_trailing_newline(self, sample_repo_map: RepoMap) -> None:
-        result = encode(sample_repo_map)
-        assert not result.endswith("\n")
+        result = encode(RepoMap(repo_name="test", root=_TMP_PATH, files=[fi]))
+        assert "symbols[1]{file,name,kind,line,signature}:" in result
+        assert "mod.py,late,function,3," in result
+
+
+class TestDump:
+    """Tests for dump."""
+
+    def test_matches_encode(self, sample_repo_map: RepoMap) -> None:
+        out = io.StringIO()
+        dump(sample_repo_map, out)
+        assert out.getvalue() == encode(sample_repo_map)
+
+    def test_empty_tables(self) -> None:
+        out = io.StringIO()
+        dump(RepoMap(repo_name="empty", root=Path("/tmp/empty")), out)
+        assert out.getvalue().split("\n") == [
+            "repo: empty",
+            "root: empty",
+            "files[0]{path,language,rank}:",
+            "symbols[0]{file,name,kind,line,signature}:",
+            "dependencies[0]{source,target,symbols}:",
+        ]